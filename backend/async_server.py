@@ -0,0 +1,540 @@
+"""Asyncio/ASGI serving mode for the chat backend.
+
+Runs the same pipeline as server.py (hardcoded answers, local router,
+classification cache, member index, event store) but awaits OpenAI and
+Supabase through their async clients, so one process can keep many chat
+requests in flight instead of pinning a worker per request.
+
+    uvicorn async_server:app --host 0.0.0.0 --port 5000 --workers 2
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+import server
+from server import (
+    QUERY_FUNCTIONS,
+    batch_results,
+    capture_request,
+    classification_cache,
+    classification_cache_key,
+    classifier_messages,
+    count_tokens,
+    find_hardcoded,
+    general_messages,
+    member_candidates_query,
+    members_query,
+    normalize_query,
+    openai_calls,
+    parse_batch,
+    parse_classification,
+    payload_rows,
+    pick_member_candidates,
+    query_events,
+    query_offers,
+    record_usage,
+    request_seconds,
+    route_query,
+    rows_fetched,
+    rows_returned,
+    search_members_locally,
+    sse_event,
+    stage_seconds,
+    speculation_guess,
+    speculator,
+    summary_cache,
+    summary_cache_key,
+    summary_messages,
+    template_summary,
+    timed_stage,
+    use_template_summary,
+)
+from metrics import registry
+from singleflight import AsyncSingleFlight
+from structured_logging import request_id
+
+logger = logging.getLogger(__name__)
+
+app = cors(Quart(__name__), allow_origin="*", allow_methods=["GET", "POST", "OPTIONS"], allow_headers=["Content-Type", "Authorization"])
+
+# Created on first use, inside the event loop that uses them
+async_clients = {"openai": None, "supabase": None}
+supabase_lock = asyncio.Lock()
+ready_state = {"ready": False, "warm_up_ms": None}
+
+# In-flight chat pipelines on this event loop, for request coalescing
+chat_flights = AsyncSingleFlight()
+
+
+def pooled_async_http_client(pool_size, timeout):
+    """Async counterpart of server.pooled_http_client"""
+    import httpx
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=server.HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=timeout,
+    )
+
+
+def openai_client():
+    """AsyncOpenAI client of this process, created on first use (see server.openai_client)"""
+    if async_clients["openai"] is None:
+        from openai import AsyncOpenAI
+
+        async_clients["openai"] = AsyncOpenAI(
+            api_key=server.OPENAI_API_KEY,
+            http_client=pooled_async_http_client(server.OPENAI_POOL_SIZE, server.OPENAI_TIMEOUT_SECONDS)
+        )
+    return async_clients["openai"]
+
+
+async def supabase_client():
+    """Async Supabase client of this process, created on first use"""
+    async with supabase_lock:
+        if async_clients["supabase"] is None:
+            from supabase import acreate_client
+            from supabase.lib.client_options import AsyncClientOptions
+
+            async_clients["supabase"] = await acreate_client(
+                server.SUPABASE_URL,
+                server.SUPABASE_KEY,
+                options=AsyncClientOptions(
+                    httpx_client=pooled_async_http_client(server.SUPABASE_POOL_SIZE, server.SUPABASE_TIMEOUT_SECONDS)
+                )
+            )
+    return async_clients["supabase"]
+
+
+@app.before_serving
+async def startup():
+    # Serve right away; /ready reports 503 until the warm-up is done
+    app.add_background_task(warm_up)
+
+
+async def warm_up():
+    started_at = time.monotonic()
+
+    # Load the local snapshots (and import the SDKs, open the sync pools) off the event loop
+    await asyncio.to_thread(server.warm_up)
+    server.health_monitor.start()
+
+    # Open the async clients' connections too
+    try:
+        await openai_client().models.list()
+    except Exception as e:
+        logger.warning("Error warming up OpenAI connection: %s", e)
+    try:
+        await supabase_client()
+    except Exception as e:
+        logger.warning("Error creating Supabase client: %s", e)
+
+    ready_state["warm_up_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    ready_state["ready"] = True
+
+
+@app.before_request
+async def assign_request_id():
+    """See server.assign_request_id; each request runs in its own task, so the id stays with it"""
+    request_id.set(request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex[:16])
+
+
+@app.after_request
+async def add_request_id(response):
+    response.headers["X-Request-ID"] = request_id.get()
+    return response
+
+
+@app.route("/health", methods=["GET"])
+async def health():
+    """Health check endpoint - cached dependency status, see server.health"""
+    server.health_monitor.start()
+    report = server.health_report()
+    report["coalescing"] = chat_flights.stats()
+    return jsonify(report)
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    """Prometheus metrics of this process"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/ready", methods=["GET"])
+async def ready():
+    """Readiness check: 200 once startup warm-up has finished"""
+    status = 200 if ready_state["ready"] else 503
+    return jsonify({
+        "status": "ready" if ready_state["ready"] else "warming_up",
+        "warm_up_ms": ready_state["warm_up_ms"],
+        "errors": server.readiness["errors"],
+        "pid": os.getpid()
+    }), status
+
+
+@app.route("/api/chat", methods=["POST"])
+async def chat():
+    """Handle AI assistant queries - same contract as server.chat"""
+    started_at = time.monotonic()
+    user_query, summary_mode = "", server.SUMMARY_MODE
+    try:
+        data = await request.get_json() or {}
+        user_query = data.get("query", "")
+        summary_mode = data.get("summary_mode") or server.SUMMARY_MODE
+
+        speculate = bool(data.get("speculate", server.SPECULATIVE_PREFETCH))
+
+        if not user_query:
+            return jsonify({"error": "Query is required"}), 400
+
+        response = await respond(user_query, summary_mode, started_at, speculate)
+        elapsed = time.monotonic() - started_at
+        request_seconds.observe(elapsed, endpoint="chat", category=response["category"])
+        logger.info("Chat request answered", extra={"category": response["category"], "elapsed_ms": round(elapsed * 1000, 1)})
+        # Stage timings are only collected per request by the Flask app
+        capture_request(user_query, summary_mode, response["category"], 200, started_at)
+        return jsonify(response)
+
+    except Exception as e:
+        logger.exception("Error in chat endpoint")
+        capture_request(user_query, summary_mode, None, 500, started_at)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/chat/batch", methods=["POST"])
+async def chat_batch():
+    """Answer a list of queries in one request - same contract as server.chat_batch"""
+    started_at = time.monotonic()
+    try:
+        queries, unique, summary_mode, speculate, parallelism = parse_batch(await request.get_json() or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(query):
+        async with semaphore:
+            return await timed_respond(query, summary_mode, speculate)
+
+    outcomes = dict(zip(unique, await asyncio.gather(*(run(query) for query in unique.values()))))
+
+    return jsonify({
+        "results": batch_results(queries, outcomes),
+        "unique_queries": len(unique),
+        "parallelism": parallelism,
+        "elapsed_ms": round((time.monotonic() - started_at) * 1000, 1)
+    })
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+async def chat_stream():
+    """Streaming variant of /api/chat - same Server-Sent Events as server.chat_stream"""
+    started_at = time.monotonic()
+    data = await request.get_json() or {}
+    user_query = data.get("query", "")
+    summary_mode = data.get("summary_mode") or server.SUMMARY_MODE
+
+    if not user_query:
+        return jsonify({"error": "Query is required"}), 400
+
+    # The body is sent after the handler returns, so carry the request id over
+    stream_request_id = request_id.get()
+
+    async def generate():
+        request_id.set(stream_request_id)
+        try:
+            hardcoded = find_hardcoded(user_query)
+            if hardcoded:
+                yield sse_event("data", {"category": hardcoded["category"], "data": hardcoded["data"]})
+                yield sse_event("token", {"text": hardcoded["answer"]})
+                yield sse_event("done", {"answer": hardcoded["answer"]})
+                return
+
+            category, filters = route_query(user_query) or await classify_query(user_query)
+            logger.debug("Streaming query categorized", extra={"query": user_query, "category": category, "filters": filters})
+
+            if category in QUERY_FUNCTIONS:
+                results = await query_category(category, filters)
+                yield sse_event("data", {"category": category, "data": payload_rows(category, results)})
+                if use_template_summary(summary_mode, results, started_at):
+                    pieces = ready_pieces(template_summary(category, results))
+                else:
+                    pieces = stream_summary(category, user_query, results)
+                stage = "summarize"
+            else:
+                yield sse_event("data", {"category": "general", "data": None})
+                pieces = stream_general(user_query)
+                category = stage = "general"
+
+            answer = []
+            stage_started_at = time.monotonic()
+            async for piece in pieces:
+                answer.append(piece)
+                yield sse_event("token", {"text": piece})
+            stage_seconds.observe(time.monotonic() - stage_started_at, stage=stage)
+            yield sse_event("done", {"answer": "".join(answer)})
+            elapsed = time.monotonic() - started_at
+            request_seconds.observe(elapsed, endpoint="stream", category=category)
+            logger.info("Chat stream answered", extra={"category": category, "elapsed_ms": round(elapsed * 1000, 1)})
+
+        except Exception as e:
+            logger.exception("Error in chat stream endpoint")
+            yield sse_event("error", {"error": str(e)})
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def timed_respond(user_query, summary_mode, speculate=False):
+    """Async counterpart of server.timed_respond"""
+    started_at = time.monotonic()
+    try:
+        outcome = {"response": await respond(user_query, summary_mode, started_at, speculate)}
+        request_seconds.observe(time.monotonic() - started_at, endpoint="batch", category=outcome["response"]["category"])
+    except Exception as e:
+        logger.exception("Error in batch item", extra={"query": user_query})
+        outcome = {"error": str(e)}
+    outcome["elapsed_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    return outcome
+
+
+async def respond(user_query, summary_mode, started_at, speculate=False):
+    """Async counterpart of server.respond"""
+    # STEP 0: Check hardcoded responses FIRST
+    hardcoded = find_hardcoded(user_query)
+    if hardcoded:
+        return hardcoded
+
+    if not server.COALESCE_REQUESTS:
+        return await answer_query(user_query, summary_mode, started_at, speculate)
+
+    # Identical queries already being answered are joined instead of run again
+    response, shared = await chat_flights.do(
+        (normalize_query(user_query), summary_mode),
+        lambda: answer_query(user_query, summary_mode, started_at, speculate)
+    )
+    if shared:
+        logger.debug("Joined in-flight request", extra={"query": user_query})
+    return response
+
+
+async def answer_query(user_query, summary_mode, started_at, speculate=False):
+    """Async counterpart of server.answer_query"""
+    # Step 1: Categorize the query
+    speculation = None
+    routed = route_query(user_query)
+    if routed is None and speculate:
+        # The LLM has to classify this one; guess and start querying in the meantime
+        terms = speculation_guess(user_query)
+        if terms is not None:
+            speculator.record_start()
+            task = asyncio.ensure_future(fetch_member_candidates(terms))
+            task.add_done_callback(retrieve_exception)
+            speculation = (terms, time.monotonic(), task)
+    category, filters = routed or await classify_query(user_query)
+
+    logger.debug("Query categorized", extra={"query": user_query, "category": category, "filters": filters})
+
+    # Step 2: Handle based on category
+    hit = False
+    if speculation is not None:
+        terms, speculated_at, task = speculation
+        if category == "members":
+            try:
+                picked = pick_member_candidates(await task, terms, filters)
+            except Exception as e:
+                logger.warning("Error in speculative query: %s", e)
+                picked = None
+            hit = picked is not None
+        else:
+            task.cancel()
+        if hit:
+            results = picked
+            speculator.record_hit()
+        else:
+            speculator.record_waste((time.monotonic() - speculated_at) * 1000)
+        logger.debug("Speculative query resolved", extra={"terms": terms, "used": hit})
+
+    if category in QUERY_FUNCTIONS:
+        if not hit:
+            results = await query_category(category, filters)
+        with timed_stage("summarize"):
+            if use_template_summary(summary_mode, results, started_at):
+                ai_response = template_summary(category, results)
+            else:
+                ai_response = await generate_summary(category, user_query, results)
+        return {
+            "category": category,
+            "answer": ai_response,
+            "data": payload_rows(category, results)
+        }
+
+    # For general queries, just use GPT directly
+    with timed_stage("general"):
+        general_response = await openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=general_messages(user_query),
+            temperature=0.7
+        )
+    record_usage("general", general_response)
+
+    return {
+        "category": "general",
+        "answer": general_response.choices[0].message.content,
+        "data": None
+    }
+
+
+def retrieve_exception(task):
+    """Done-callback for speculation tasks: a cancelled or unawaited one that failed
+    (e.g. when classification raised) would otherwise be logged as never retrieved"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def classify_query(user_query):
+    """Async counterpart of server.classify_query"""
+    cache_key = classification_cache_key(user_query)
+    cached = classification_cache.get(cache_key)
+    if cached is not None:
+        return cached["category"], cached["filters"]
+
+    with timed_stage("classify"):
+        category_response = await openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=classifier_messages(user_query),
+            temperature=0.3
+        )
+    record_usage("classify", category_response)
+    category, filters = parse_classification(category_response.choices[0].message.content)
+
+    classification_cache.set(cache_key, {"category": category, "filters": filters})
+    return category, filters
+
+
+async def fetch_member_candidates(terms):
+    """Async counterpart of the candidate fetch in server.start_speculation"""
+    return (await member_candidates_query(await supabase_client(), terms).execute()).data
+
+
+async def query_category(category, filters):
+    """Run the members/events/offers query, awaiting Supabase only when the local indexes can't answer"""
+    try:
+        if category == "members":
+            # Timed and counted here; the events and offers functions instrument themselves
+            with timed_stage("query_members"):
+                # Off the loop: a cold or stale member index downloads profiles, and semantic
+                # search may call the embeddings API, both with the sync clients
+                answer = await asyncio.to_thread(search_members_locally, filters)
+                if answer is not None:
+                    results, fetched = answer
+                else:
+                    results = (await members_query(await supabase_client(), filters).execute()).data
+                    fetched = len(results)
+            rows_fetched.inc(fetched, category="members")
+            rows_returned.inc(len(results), category="members")
+            return results
+
+        if category == "events":
+            # In-memory event store, ranked with its BM25 index for keyword searches
+            return await asyncio.to_thread(query_events, filters)
+
+        # Ranked from the per-worker offer catalog
+        return await asyncio.to_thread(query_offers, filters)
+
+    except Exception:
+        logger.exception("Error querying %s", category)
+        return []
+
+
+async def generate_summary(category, query, results):
+    """Async counterpart of server.generate_summary"""
+    cache_key = summary_cache_key(category, query, results)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = await openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=summary_messages(category, query, results),
+            temperature=0.7
+        )
+    except Exception:
+        return f"Found {len(results)} {category} matching your criteria."
+    record_usage("summary", response)
+
+    summary = response.choices[0].message.content
+    summary_cache.set(cache_key, summary)
+    return summary
+
+
+
+async def ready_pieces(*pieces):
+    """An answer that is already complete, as a stream"""
+    for piece in pieces:
+        yield piece
+
+
+async def stream_summary(category, query, results):
+    """Async counterpart of server.stream_summary"""
+    cache_key = summary_cache_key(category, query, results)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    pieces = []
+    try:
+        stream = await openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=summary_messages(category, query, results),
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        openai_calls.inc(call="summary")
+        async for chunk in stream:
+            count_tokens("summary", chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        logger.warning("Error streaming %s summary: %s", category, e)
+        if not pieces:
+            yield f"Found {len(results)} {category} matching your criteria."
+        return
+
+    summary_cache.set(cache_key, "".join(pieces))
+
+
+async def stream_general(query):
+    """Async counterpart of server.stream_general"""
+    stream = await openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=general_messages(query),
+        temperature=0.7,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    openai_calls.inc(call="general")
+    async for chunk in stream:
+        count_tokens("general", chunk)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", 5000))
+    app.run(host="0.0.0.0", port=port)
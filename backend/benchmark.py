@@ -0,0 +1,231 @@
+"""Offline benchmark of /api/chat against local OpenAI and Supabase stand-ins.
+
+Runs every pipeline path (hardcoded, members, events, offers, general) and
+reports p50/p95/p99 latency and requests/s for each, without OpenAI credits
+or the live Supabase project:
+
+    python benchmark.py --rows 10000 --requests 200 --concurrency 8
+    python benchmark.py --openai-latency-ms 600 --jitter-ms 150 --failure-rate 0.02
+    python benchmark.py --cold      # classifier and summary caches disabled
+
+By default the app is driven in-process through the Flask test client. To
+measure a real deployment (gunicorn workers, the async server), start only
+the stand-ins, export the printed environment for the server, and point the
+benchmark at it:
+
+    python benchmark.py --serve --rows 100000
+    python benchmark.py --target http://127.0.0.1:5000
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from health_monitor import percentile
+from stand_ins import StandInOpenAI, StandInSupabase, synthetic_tables
+
+# Queries per pipeline path; each request picks the next one in turn
+PATH_QUERIES = {
+    "hardcoded": ["who is the india head of yi", "which is the biggest yi chapter in india"],
+    "members": ["who works in data science", "members working in fintech", "people working at razorpay"],
+    "events": ["upcoming events", "events about product management", "cyber security events"],
+    "offers": ["offers related to gym", "any travel offers", "dining discounts"],
+    "general": ["tell me a joke", "how do I write a good pitch", "what makes a good mentor"],
+}
+
+# Hardcoded answers come back as category "general"
+EXPECTED_CATEGORY = {"hardcoded": "general"}
+
+
+def stand_in_key():
+    """A JWT-shaped key; the stand-in never checks it but the Supabase client wants the format"""
+    def encode(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'role': 'anon', 'iss': 'stand-in'})}.c3RhbmQtaW4"
+
+
+def stand_in_env(openai, supabase, cold=False):
+    """Environment that points the backend at the stand-ins"""
+    env = {
+        "OPENAI_API_KEY": "sk-stand-in",
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "SUPABASE_URL": supabase.url,
+        "SUPABASE_KEY": stand_in_key(),
+        "SEMANTIC_INDEX_PATH": os.path.join(tempfile.gettempdir(), "yi-benchmark-vectors.npz"),
+    }
+    if cold:
+        # Expire cache entries as soon as they are written, so every request pays full price
+        env["CLASSIFIER_CACHE_TTL"] = "0"
+        env["SUMMARY_CACHE_TTL"] = "0"
+    return env
+
+
+def start_stand_ins(args):
+    started_at = time.monotonic()
+    tables = synthetic_tables(args.rows, seed=args.seed)
+    print(f"Generated {args.rows} rows per table in {round((time.monotonic() - started_at) * 1000)} ms")
+    openai = StandInOpenAI(
+        latency_ms=args.openai_latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.openai_failure_rate, port=args.openai_port, seed=args.seed
+    ).start()
+    supabase = StandInSupabase(
+        tables, latency_ms=args.supabase_latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.supabase_failure_rate, port=args.supabase_port, seed=args.seed
+    ).start()
+    return openai, supabase
+
+
+def in_process_sender(env, verbose=False):
+    """send(payload) -> (status, body) through the Flask test client of a freshly imported server.
+
+    Unless verbose, the server only logs warnings and errors: per-request
+    records would slow the in-process app down.
+    """
+    os.environ.update(env)
+    started_at = time.monotonic()
+    import server
+    imported_ms = (time.monotonic() - started_at) * 1000
+    if not verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    server.warm_up()
+    print(f"server imported in {round(imported_ms)} ms, warmed up in {server.readiness['warm_up_ms']} ms")
+
+    clients = threading.local()
+
+    def send(payload):
+        if not hasattr(clients, "client"):
+            clients.client = server.app.test_client()
+        response = clients.client.post("/api/chat", json=payload)
+        return response.status_code, response.get_json(silent=True) or {}
+    return send
+
+
+def http_sender(target, concurrency):
+    """send(payload) -> (status, body) over HTTP to a running server"""
+    import httpx
+
+    http = httpx.Client(base_url=target, timeout=120, limits=httpx.Limits(max_connections=concurrency))
+
+    def send(payload):
+        try:
+            response = http.post("/api/chat", json=payload)
+        except httpx.HTTPError as e:
+            return 0, {"error": str(e)}
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {}
+    return send
+
+
+def run_path(send, path, requests, concurrency, summary_mode=None):
+    """Send `requests` queries of one path, `concurrency` at a time, and summarize the latencies"""
+    queries = PATH_QUERIES[path]
+    expected = EXPECTED_CATEGORY.get(path, path)
+
+    def one(index):
+        payload = {"query": queries[index % len(queries)]}
+        if summary_mode:
+            payload["summary_mode"] = summary_mode
+        started_at = time.monotonic()
+        status, body = send(payload)
+        elapsed_ms = (time.monotonic() - started_at) * 1000
+        failed = status != 200 or "error" in body
+        misrouted = not failed and body.get("category") != expected
+        return elapsed_ms, failed, misrouted
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(requests)))
+    wall = time.monotonic() - started_at
+
+    latencies = sorted(elapsed_ms for elapsed_ms, _, _ in outcomes)
+    return {
+        "path": path,
+        "requests": requests,
+        "errors": sum(failed for _, failed, _ in outcomes),
+        "misrouted": sum(misrouted for _, _, misrouted in outcomes),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "rps": round(requests / wall, 1),
+    }
+
+
+def print_report(results):
+    columns = ["path", "requests", "errors", "misrouted", "p50_ms", "p95_ms", "p99_ms", "rps"]
+    widths = {column: max(len(column), *(len(str(result[column])) for result in results)) for column in columns}
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for result in results:
+        print("  ".join(str(result[column]).rjust(widths[column]) for column in columns))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="rows per synthetic table (profiles, events, benefits)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per path")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--paths", default=",".join(PATH_QUERIES), help="comma-separated subset of " + ", ".join(PATH_QUERIES))
+    parser.add_argument("--summary-mode", choices=["auto", "llm", "template"], help="summary_mode sent with every request")
+    parser.add_argument("--cold", action="store_true", help="disable the classifier and summary caches (in-process or --serve)")
+    parser.add_argument("--openai-latency-ms", type=float, default=400.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter added to both stand-ins")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="failure rate of both stand-ins")
+    parser.add_argument("--openai-failure-rate", type=float)
+    parser.add_argument("--supabase-failure-rate", type=float)
+    parser.add_argument("--openai-port", type=int, default=0)
+    parser.add_argument("--supabase-port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--serve", action="store_true", help="only run the stand-ins and print the environment for a server")
+    parser.add_argument("--target", help="benchmark a running server at this URL instead of the in-process app")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's INFO logs (they slow the in-process app down)")
+    args = parser.parse_args(argv)
+    if args.openai_failure_rate is None:
+        args.openai_failure_rate = args.failure_rate
+    if args.supabase_failure_rate is None:
+        args.supabase_failure_rate = args.failure_rate
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    unknown = [path for path in paths if path not in PATH_QUERIES]
+    if unknown:
+        raise SystemExit(f"Unknown paths: {', '.join(unknown)}")
+
+    if args.target:
+        send = http_sender(args.target, args.concurrency)
+    else:
+        openai, supabase = start_stand_ins(args)
+        env = stand_in_env(openai, supabase, cold=args.cold)
+        if args.serve:
+            print("Stand-ins running; start the server with:")
+            for name, value in env.items():
+                print(f"export {name}={value}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return
+        send = in_process_sender(env, args.verbose)
+
+    results = [run_path(send, path, args.requests, args.concurrency, args.summary_mode) for path in paths]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    if not args.target:
+        for name, stand_in in (("OpenAI", openai), ("Supabase", supabase)):
+            print(f"{name} stand-in: {stand_in.requests} requests, {stand_in.failures} injected failures")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from collections import deque
+
+
+def normalize(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation ("...yi?" == "...yi")"""
+    return " ".join(text.lower().split()).strip(" ?!.")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every keyword in a text in a single pass"""
+
+    def __init__(self, keywords):
+        # Node 0 is the root; each node has goto edges, a failure link and the keywords ending there
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for index, keyword in enumerate(keywords):
+            node = 0
+            for char in keyword:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.output[node].append(index)
+
+        # Breadth-first pass to set failure links, merging outputs of suffix matches
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                if node == 0:
+                    continue
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find_all(self, text):
+        """Indexes of every keyword occurring anywhere in `text`"""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            found.update(self.output[node])
+        return found
+
+
+class CannedAnswers:
+    """Matches queries against hardcoded Q&A entries.
+
+    Each entry has an "answer", the exact "questions" it answers and the
+    "keywords" that trigger it anywhere in a query. Questions are compared
+    after normalization, so punctuation/case variants need no duplicates.
+    When several keywords match, the entry listed first wins.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.questions = {}
+        self.keywords = []
+        self.keyword_entries = []
+        for entry in entries:
+            for question in entry.get("questions", []):
+                self.questions.setdefault(normalize(question), entry)
+            for keyword in entry.get("keywords", []):
+                self.keywords.append(normalize(keyword))
+                self.keyword_entries.append(entry)
+        self.automaton = KeywordAutomaton(self.keywords)
+
+    def match(self, query):
+        """Return (entry, how) where how is "exact" or the matched keyword, or (None, None)"""
+        normalized = normalize(query)
+        entry = self.questions.get(normalized)
+        if entry is not None:
+            return entry, "exact"
+
+        found = self.automaton.find_all(normalized)
+        if found:
+            first = min(found)
+            return self.keyword_entries[first], self.keywords[first]
+        return None, None
@@ -0,0 +1,158 @@
+"""Offline accuracy check of classifier prompt versions (classifier_prompts.py).
+
+Classifies every query of a fixture file with a baseline and a candidate
+prompt version and reports, per version, how often the category and the
+filters match the fixture labels, how often the candidate agrees with the
+baseline, and the prompt/completion/cached tokens and latency per call:
+
+    python classifier_eval.py                          # v2 against v1
+    python classifier_eval.py --baseline v1 --candidate v2 --show-mismatches
+    python classifier_eval.py --estimate               # prompt sizes only, no API calls
+
+It calls the OpenAI API (OPENAI_API_KEY) with the same model and
+temperature as the server, and exits with status 1 when the candidate's
+category accuracy falls more than --tolerance below the baseline's. The
+local stand-in (OPENAI_BASE_URL) classifies by keywords and ignores the
+prompt, so only a run against the real API says anything about a version.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from classifier_prompts import CLASSIFIER_PROMPTS
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "classifier_queries.jsonl")
+
+
+def load_fixtures(path):
+    with open(path, encoding="utf-8") as fixture_file:
+        return [json.loads(line) for line in fixture_file if line.strip()]
+
+
+def normalize_filters(filters):
+    """Filters compared case-insensitively, ignoring empty values"""
+    if not isinstance(filters, dict):
+        return {}
+    return {key: str(value).strip().lower() for key, value in filters.items() if value not in (None, "", [], {})}
+
+
+def estimate_tokens(text):
+    """Token count with tiktoken if it is installed, otherwise about four characters per token"""
+    try:
+        import tiktoken
+    except ImportError:
+        return round(len(text) / 4)
+    return len(tiktoken.get_encoding("o200k_base").encode(text))
+
+
+def classify(client, prompt, query, model):
+    """(category, filters, usage dict, latency ms) for one query"""
+    started_at = time.monotonic()
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": prompt}, {"role": "user", "content": query}],
+        temperature=0.3
+    )
+    latency_ms = (time.monotonic() - started_at) * 1000
+    usage = response.usage
+    details = getattr(usage, "prompt_tokens_details", None)
+    tokens = {
+        "prompt": usage.prompt_tokens if usage else 0,
+        "completion": usage.completion_tokens if usage else 0,
+        "cached": (getattr(details, "cached_tokens", None) or 0) if usage else 0,
+    }
+    try:
+        reply = json.loads(response.choices[0].message.content)
+        category, filters = reply.get("category"), reply.get("filters", {})
+    except (ValueError, AttributeError):
+        category, filters = None, {}
+    return category, filters, tokens, latency_ms
+
+
+def run_version(client, version, fixtures, model, concurrency):
+    prompt = CLASSIFIER_PROMPTS[version]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda fixture: classify(client, prompt, fixture["query"], model), fixtures))
+
+
+def score(fixtures, results):
+    """Accuracy against the fixture labels, plus token and latency averages"""
+    count = len(fixtures)
+    category_hits = sum(result[0] == fixture["category"] for fixture, result in zip(fixtures, results))
+    filter_hits = sum(
+        result[0] == fixture["category"] and normalize_filters(result[1]) == normalize_filters(fixture.get("filters"))
+        for fixture, result in zip(fixtures, results)
+    )
+    key_hits = sum(
+        result[0] == fixture["category"] and set(normalize_filters(result[1])) == set(normalize_filters(fixture.get("filters")))
+        for fixture, result in zip(fixtures, results)
+    )
+    latencies = sorted(result[3] for result in results)
+    return {
+        "category_accuracy": round(category_hits / count, 4),
+        "filter_accuracy": round(filter_hits / count, 4),
+        "filter_key_accuracy": round(key_hits / count, 4),
+        "avg_prompt_tokens": round(sum(result[2]["prompt"] for result in results) / count, 1),
+        "avg_cached_tokens": round(sum(result[2]["cached"] for result in results) / count, 1),
+        "avg_completion_tokens": round(sum(result[2]["completion"] for result in results) / count, 1),
+        "p50_latency_ms": round(latencies[len(latencies) // 2], 1),
+    }
+
+
+def agreement(baseline, candidate):
+    count = len(baseline)
+    same_category = sum(b[0] == c[0] for b, c in zip(baseline, candidate))
+    same_filters = sum(b[0] == c[0] and normalize_filters(b[1]) == normalize_filters(c[1]) for b, c in zip(baseline, candidate))
+    return {"category_agreement": round(same_category / count, 4), "filter_agreement": round(same_filters / count, 4)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default="v1", choices=sorted(CLASSIFIER_PROMPTS))
+    parser.add_argument("--candidate", default="v2", choices=sorted(CLASSIFIER_PROMPTS))
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tolerance", type=float, default=0.0, help="allowed drop in category accuracy")
+    parser.add_argument("--estimate", action="store_true", help="only print estimated prompt sizes")
+    parser.add_argument("--show-mismatches", action="store_true", help="list queries where the two versions disagree")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    versions = [args.baseline, args.candidate]
+
+    for version in versions:
+        prompt = CLASSIFIER_PROMPTS[version]
+        print(f"{version}: {len(prompt)} characters, ~{estimate_tokens(prompt)} tokens")
+    if args.estimate:
+        return 0
+
+    from openai import OpenAI
+
+    client = OpenAI()
+    fixtures = load_fixtures(args.fixtures)
+    results = {version: run_version(client, version, fixtures, args.model, args.concurrency) for version in versions}
+
+    report = {version: score(fixtures, results[version]) for version in versions}
+    report["agreement"] = agreement(results[args.baseline], results[args.candidate])
+    print(json.dumps(report, indent=2))
+
+    if args.show_mismatches:
+        for fixture, b, c in zip(fixtures, results[args.baseline], results[args.candidate]):
+            if b[0] != c[0] or normalize_filters(b[1]) != normalize_filters(c[1]):
+                print(f"- {fixture['query']!r}: {args.baseline}={b[0]} {b[1]}  {args.candidate}={c[0]} {c[1]}")
+
+    drop = report[args.baseline]["category_accuracy"] - report[args.candidate]["category_accuracy"]
+    if drop > args.tolerance:
+        print(f"{args.candidate} category accuracy is {round(drop * 100, 1)} points below {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
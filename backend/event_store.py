@@ -0,0 +1,94 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from ranking import RankedTable, row_key
+
+# Event columns ranked for keyword searches, with their BM25 boosts
+SEARCH_FIELDS = {
+    "title": 3.0,
+    "category": 2.0,
+    "location_name": 1.0,
+    "host_name": 1.0,
+    "description": 1.0,
+}
+
+
+def parse_timestamp(value):
+    """Parse a Supabase timestamp into an aware UTC datetime (None if missing/invalid)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class EventStoreState:
+    """Events of one snapshot, sorted by start_time and by end_time"""
+
+    def __init__(self, rows):
+        timed = []
+        untimed = []
+        for row in rows:
+            start = parse_timestamp(row.get("start_time"))
+            if start is None:
+                untimed.append(row)
+            else:
+                timed.append((start, parse_timestamp(row.get("end_time")), row))
+        timed.sort(key=lambda x: x[0])
+
+        self.by_start = [row for start, end, row in timed]
+        self.start_keys = [start for start, end, row in timed]
+        # Events without a start_time sort last, like NULLs in an ascending Postgres order
+        self.all_rows = self.by_start + untimed
+
+        with_end = sorted(
+            ((end, start, row) for start, end, row in timed if end is not None),
+            key=lambda x: x[0],
+        )
+        self.end_keys = [end for end, start, row in with_end]
+        self.by_end = [(start, row) for end, start, row in with_end]
+        self.by_key = {row_key(row): row for row in rows}
+
+
+class EventStore(RankedTable):
+    """Per-worker, time-ordered copy of the events table.
+
+    Date and timeframe filters become bisect range lookups over pre-parsed
+    datetimes instead of a Supabase round-trip per request, and keyword
+    searches are ranked with the BM25 index from RankedTable.
+    """
+
+    def __init__(self, loader, ttl=300):
+        super().__init__(loader, SEARCH_FIELDS, ttl=ttl)
+
+    def build(self, rows):
+        self.ranking.sync(rows)
+        return EventStoreState(rows)
+
+    def all(self):
+        """Every event in ascending start_time order"""
+        return list(self.state().all_rows)
+
+    def starting_between(self, start, end):
+        """Events with start <= start_time <= end"""
+        state = self.state()
+        lo = bisect_left(state.start_keys, start)
+        hi = bisect_right(state.start_keys, end)
+        return state.by_start[lo:hi]
+
+    def starting_after(self, moment):
+        """Events with start_time >= moment"""
+        state = self.state()
+        return state.by_start[bisect_left(state.start_keys, moment):]
+
+    def ongoing(self, moment):
+        """Events that have started and whose end_time has not passed"""
+        state = self.state()
+        lo = bisect_left(state.end_keys, moment)
+        running = [(start, row) for start, row in state.by_end[lo:] if start <= moment]
+        running.sort(key=lambda x: x[0])
+        return [row for start, row in running]
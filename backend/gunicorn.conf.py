@@ -0,0 +1,29 @@
+"""gunicorn settings for the Flask backend (picked up automatically from this directory).
+
+    gunicorn server:app
+
+Importing the app is cheap: every worker creates its own OpenAI/Supabase
+clients and connection pools on first use after it is forked, and warms
+up in the background; /ready reports 503 until that is done, while /health
+only says the process is alive.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# Import the app once in the master and fork it, so new workers start faster.
+# Clients and pools are still created per worker, by the warm-up started below.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def post_worker_init(worker):
+    """Runs in each worker after the fork, once the app is loaded"""
+    import server
+    from structured_logging import configure_logging
+
+    # The log writer thread doesn't survive the fork
+    configure_logging()
+    server.start_warm_up()
@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Probe latencies kept per dependency for the percentiles
+LATENCY_WINDOW = 100
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class DependencyStatus:
+    """Outcome and recent latencies of the probes for one dependency"""
+
+    def __init__(self):
+        self.ok = None
+        self.error = None
+        self.checked_at = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency_ms, error=None):
+        self.ok = error is None
+        self.error = error
+        self.checked_at = datetime.utcnow().isoformat()
+        self.latencies.append(latency_ms)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            "ok": self.ok,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "latency_ms": {
+                "last": round(self.latencies[-1], 1) if self.latencies else None,
+                "p50": _round(percentile(latencies, 0.50)),
+                "p95": _round(percentile(latencies, 0.95)),
+                "p99": _round(percentile(latencies, 0.99)),
+                "samples": len(latencies),
+            },
+        }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+class HealthMonitor:
+    """Probes dependencies from a background thread and caches the results.
+
+    `checks` maps a dependency name to a function that raises when it is
+    unhealthy. Health endpoints read `snapshot()`, which never calls a
+    dependency itself, so probes cost one call per dependency per
+    `interval` seconds per worker however often the endpoint is hit.
+    """
+
+    def __init__(self, checks, interval=30):
+        self.checks = checks
+        self.interval = interval
+        self.statuses = {name: DependencyStatus() for name in checks}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        """Start the prober thread (once per process, so it is restarted after a fork)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def probe(self):
+        """Run every check once and record the outcome"""
+        for name, check in self.checks.items():
+            started_at = time.monotonic()
+            error = None
+            try:
+                check()
+            except Exception as e:
+                error = str(e)
+            latency_ms = (time.monotonic() - started_at) * 1000
+            with self._lock:
+                self.statuses[name].record(latency_ms, error)
+
+    def snapshot(self):
+        """Cached status of every dependency plus an overall status"""
+        with self._lock:
+            dependencies = {name: status.summary() for name, status in self.statuses.items()}
+        results = [dependency["ok"] for dependency in dependencies.values()]
+        if any(ok is None for ok in results):
+            status = "starting"
+        elif all(results):
+            status = "ok"
+        else:
+            status = "degraded"
+        return {"status": status, "probe_interval_s": self.interval, "dependencies": dependencies}
+
+    def _run(self):
+        # The first probe is left to the caller (worker warm-up), then one per interval
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning("Error probing dependencies: %s", e)
@@ -0,0 +1,187 @@
+import logging
+
+from ranking import RankedTable, fuse, row_key, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Profile columns that member search looks at
+INDEXED_FIELDS = ["first_name", "last_name", "full_name", "company", "industry", "job_title", "location", "role"]
+
+# profiles columns that can be filtered with ilike (here and in the database query)
+FILTER_COLUMNS = ["company", "industry", "role", "location", "job_title"]
+
+# BM25 boosts for keyword searches (names and work details matter most)
+KEYWORD_BOOSTS = {
+    "first_name": 2.0,
+    "last_name": 2.0,
+    "full_name": 3.0,
+    "company": 2.0,
+    "industry": 1.5,
+    "job_title": 2.0,
+    "location": 1.0,
+    "role": 1.0,
+}
+
+# "Field"/area-of-work searches only look at what someone does
+FIELD_BOOSTS = {"job_title": 3.0, "industry": 2.0, "company": 1.0}
+
+# Length of the token fragments that narrow substring lookups to a few tokens
+GRAM_LENGTH = 3
+
+# Substring lookups are memoized per snapshot; cap the memo so odd queries can't grow it forever
+MAX_MEMO_ENTRIES = 5000
+
+
+def normalize(value):
+    """Lowercase a column value for matching (None becomes empty)"""
+    if value is None:
+        return ""
+    return str(value).lower()
+
+
+def grams(token):
+    return {token[start:start + GRAM_LENGTH] for start in range(len(token) - GRAM_LENGTH + 1)}
+
+
+class MemberIndexState:
+    """Immutable inverted index over the filter columns of one snapshot of the profiles table"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_key = {row_key(row): row for row in rows}
+        self.normalized = []
+        # field -> token -> set of row positions
+        self.postings = {field: {} for field in FILTER_COLUMNS}
+        # field -> GRAM_LENGTH fragment -> tokens containing it
+        self.grams = {field: {} for field in FILTER_COLUMNS}
+        self._memo = {}
+
+        for doc_id, row in enumerate(rows):
+            normalized = {field: normalize(row.get(field)) for field in FILTER_COLUMNS}
+            self.normalized.append(normalized)
+            for field, text in normalized.items():
+                field_postings = self.postings[field]
+                for token in set(tokenize(text)):
+                    field_postings.setdefault(token, set()).add(doc_id)
+        for field, field_postings in self.postings.items():
+            field_grams = self.grams[field]
+            for token in field_postings:
+                for gram in grams(token):
+                    field_grams.setdefault(gram, set()).add(token)
+
+    def tokens_containing(self, field, fragment):
+        """Indexed tokens of `field` that contain `fragment`"""
+        if len(fragment) < GRAM_LENGTH:
+            return [token for token in self.postings[field] if fragment in token]
+        tokens = None
+        for gram in grams(fragment):
+            gram_tokens = self.grams[field].get(gram, set())
+            tokens = gram_tokens if tokens is None else tokens & gram_tokens
+            if not tokens:
+                return []
+        return [token for token in tokens if fragment in token]
+
+    def docs_with_token_substring(self, field, fragment):
+        """Row positions whose `field` has a token containing `fragment`"""
+        key = (field, fragment)
+        docs = self._memo.get(key)
+        if docs is None:
+            docs = set()
+            for token in self.tokens_containing(field, fragment):
+                docs |= self.postings[field][token]
+            if len(self._memo) >= MAX_MEMO_ENTRIES:
+                self._memo.clear()
+            self._memo[key] = docs
+        return docs
+
+    def candidates(self, field, text):
+        """Superset of the rows whose `field` contains `text` as a substring.
+
+        Every token of `text` must appear inside some token of the field, so
+        intersecting the per-token postings never drops a real match. Callers
+        still verify the exact substring on the returned rows.
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return set(range(len(self.rows)))
+        docs = None
+        for token in tokens:
+            token_docs = self.docs_with_token_substring(field, token)
+            docs = set(token_docs) if docs is None else docs & token_docs
+            if not docs:
+                break
+        return docs
+
+    def filter_contains(self, docs, field, text):
+        """Narrow `docs` to rows whose `field` contains `text` (ilike '%text%')"""
+        text = text.lower()
+        docs = docs & self.candidates(field, text)
+        return {doc_id for doc_id in docs if text in self.normalized[doc_id][field]}
+
+
+class MemberIndex(RankedTable):
+    """Per-worker index over member profiles.
+
+    Ranks "field" and "keyword" searches in query_members with BM25 over the
+    profile columns, and answers the ilike-style column filters from postings
+    lists, instead of downloading and scanning the whole profiles table.
+    With a `semantic` VectorIndex, BM25 results are fused with the members
+    whose profiles are closest in meaning, so "ML" also finds "machine learning".
+    """
+
+    def __init__(self, loader, ttl=300, semantic=None):
+        super().__init__(loader, KEYWORD_BOOSTS, ttl=ttl)
+        self.semantic = semantic
+
+    def build(self, rows):
+        self.ranking.sync(rows)
+        if self.semantic is not None:
+            try:
+                self.semantic.sync(rows)
+            except Exception as e:
+                # Keep serving BM25 results with whatever vectors are already indexed
+                logger.warning("Error updating semantic member index: %s", e)
+        return MemberIndexState(rows)
+
+    def search_field(self, field, filters, limit=20):
+        """Rank members by how well job_title/industry/company match an area of work.
+
+        Returns (rows, candidates): the best rows and how many rows the column filters left to rank.
+        """
+        state = self.state()
+        keys = self._apply_column_filters(state, filters)
+        ranked = self.ranking.search(field, limit, boosts=FIELD_BOOSTS, keys=keys)
+        candidates = len(state.rows) if keys is None else len(keys)
+        return self._rows(state, self._with_semantic(field, ranked, limit, keys)), candidates
+
+    def search_keyword(self, keyword, limit=20):
+        """Members best matching the keyword across name, company, industry, job, location and role.
+
+        Returns (rows, candidates) like search_field; every member is a candidate.
+        """
+        state = self.state()
+        ranked = self.ranking.search(keyword, limit)
+        return self._rows(state, self._with_semantic(keyword, ranked, limit)), len(state.rows)
+
+    def _with_semantic(self, query, ranked, limit, keys=None):
+        if self.semantic is None:
+            return ranked
+        try:
+            similar = self.semantic.search(query, limit, keys)
+        except Exception as e:
+            logger.warning("Error in semantic member search: %s", e)
+            return ranked
+        return fuse([ranked, similar], limit)
+
+    def _rows(self, state, ranked):
+        return [state.by_key[key] for key, score in ranked if key in state.by_key]
+
+    def _apply_column_filters(self, state, filters):
+        """Keys of the rows passing the column filters, or None when there are none"""
+        columns = [column for column in FILTER_COLUMNS if filters.get(column)]
+        if not columns:
+            return None
+        docs = set(range(len(state.rows)))
+        for column in columns:
+            docs = state.filter_contains(docs, column, str(filters[column]))
+        return {row_key(state.rows[doc_id]) for doc_id in docs}
@@ -0,0 +1,75 @@
+import json
+
+# Columns sent back to the browser in "data": what the chat cards render, plus
+# the fields template summaries mention and updated_at for summary caching
+PAYLOAD_COLUMNS = {
+    "members": ["id", "full_name", "first_name", "last_name", "avatar_url", "job_title", "company", "industry", "location", "match_reason", "updated_at"],
+    "events": ["id", "title", "start_time", "end_time", "location_name", "category", "host_name", "image_url", "is_featured", "updated_at"],
+    "offers": ["id", "title", "description", "code", "promo_code", "link", "expiration_date", "updated_at"],
+}
+
+# Even smaller view of each row for the summary prompt
+PROMPT_COLUMNS = {
+    "members": ["full_name", "job_title", "company", "industry", "location"],
+    "events": ["title", "start_time", "location_name", "category", "host_name", "description"],
+    "offers": ["title", "description", "code", "expiration_date"],
+}
+
+# Rows included in a summary prompt and how much of it they may take up
+PROMPT_ROWS = 5
+PROMPT_CHAR_BUDGET = 2400
+# Long text fields (descriptions) are cut to this many characters in prompts
+PROMPT_TEXT_LIMIT = 200
+
+
+def select_columns(*column_lists):
+    """Comma-separated column list for a Supabase select, in first-seen order"""
+    columns = []
+    for column_list in column_lists:
+        for column in column_list:
+            if column not in columns:
+                columns.append(column)
+    return ",".join(columns)
+
+
+def project(row, columns):
+    """Copy of `row` restricted to `columns` (columns the row doesn't have are skipped)"""
+    return {column: row[column] for column in columns if column in row}
+
+
+def payload_rows(category, rows):
+    """Rows as returned to the client for a members/events/offers query"""
+    if not rows:
+        return rows
+    columns = PAYLOAD_COLUMNS[category]
+    return [project(row, columns) for row in rows]
+
+
+def truncate(value, limit=PROMPT_TEXT_LIMIT):
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit - 3].rstrip() + "..."
+    return value
+
+
+def prompt_rows(category, rows, max_rows=PROMPT_ROWS, budget=PROMPT_CHAR_BUDGET):
+    """Compact, truncated rows for a summary prompt, kept within a character budget"""
+    compact = []
+    used = 2
+    for row in rows[:max_rows]:
+        entry = {
+            column: truncate(row[column])
+            for column in PROMPT_COLUMNS[category]
+            if row.get(column) not in (None, "")
+        }
+        size = len(json.dumps(entry, separators=(",", ":"), default=str)) + 1
+        # Always keep the top row, then stop once the next one would go over budget
+        if compact and used + size > budget:
+            break
+        compact.append(entry)
+        used += size
+    return compact
+
+
+def prompt_json(category, rows):
+    """prompt_rows serialized as compact JSON"""
+    return json.dumps(prompt_rows(category, rows), separators=(",", ":"), default=str)
@@ -0,0 +1,240 @@
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+RouteResult = namedtuple("RouteResult", ["category", "filters", "confidence", "route"])
+
+# Polite lead-ins and filler that don't change what the user is asking for
+_LEAD = (
+    r"(?:(?:please |can you |could you )?"
+    r"(?:show me|show|find me|find|list|get me|get|give me|search for|look for|looking for|"
+    r"are there any|are there|is there any|any|what are the|what are|i want|i need) )?"
+    r"(?:all |the |some |any )?"
+)
+_TAIL = r"(?: please| for me)?"
+
+_EVENTS = r"(?:events?|meetups?|workshops?|sessions?|webinars?|conferences?)"
+_TIMEFRAME = r"(?P<timeframe>upcoming|future|next|recent|past|previous|ongoing|current|live)"
+_OFFERS = r"(?:offers?|deals?|discounts?|benefits?|perks?|coupons?)"
+_PEOPLE = r"(?:members?|people|persons?|profiles?|someone|anyone|folks)"
+_PHRASE = r"[a-z0-9][a-z0-9 &+./-]{0,48}?"
+
+TIMEFRAME_ALIASES = {
+    "upcoming": "upcoming",
+    "future": "upcoming",
+    "next": "upcoming",
+    "recent": "recent",
+    "past": "recent",
+    "previous": "recent",
+    "ongoing": "ongoing",
+    "current": "ongoing",
+    "live": "ongoing",
+}
+
+# Words that, on their own, mean the user wants a category rather than a topic
+GENERIC_WORDS = {"event", "events", "offer", "offers", "member", "members", "the", "all", "any", "some", "new", "good"}
+
+# A captured topic containing any of these is probably a question, not a search term
+QUESTION_WORDS = {
+    "how", "what", "why", "when", "where", "who", "which", "can", "could", "do", "does", "did",
+    "i", "me", "my", "we", "our", "you", "is", "are", "was", "should", "register", "create",
+    "host", "cancel", "join", "attend", "book", "claim", "use", "not", "no",
+}
+
+# A captured value containing any of these joins several constraints ("infosys in pune",
+# "data science at google"); the LLM splits those into separate filters
+CONNECTOR_WORDS = {"in", "at", "based", "from", "and", "near"}
+
+# A captured keyword containing any of these qualifies the results (when, which order, what
+# price or status) rather than naming a topic: "december events", "top 5 offers", "expired offers"
+MODIFIER_WORDS = {
+    # Time
+    "yesterday", "today", "tonight", "tomorrow", "weekend", "weekends", "week", "weeks", "weekly",
+    "month", "months", "monthly", "year", "years", "yearly", "annual", "daily", "morning", "afternoon",
+    "evening", "night", "this", "last", "next", "previous", "past", "upcoming", "recent", "recently",
+    "latest", "earlier", "later", "soon", "now", "old", "older", "ago",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    # Ordering
+    "best", "top", "popular", "most", "newest", "oldest", "first", "biggest", "largest", "highest",
+    "lowest", "trending", "featured", "recommended", "favourite", "favorite",
+    # Price
+    "cheap", "cheaper", "cheapest", "free", "paid", "expensive", "affordable", "budget", "price", "priced",
+    # Status
+    "expired", "expiring", "active", "inactive", "cancelled", "canceled", "postponed", "rescheduled",
+    "valid", "invalid", "available", "unavailable", "open", "closed", "full", "finished", "completed",
+    "ongoing", "live", "current",
+}
+
+# Dates relative to today, which a classification resolves differently from one day to the next
+RELATIVE_DATE_RE = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|(?:this|next|last|coming|past) (?:week|weekend|month|year)|in \d+ (?:days?|weeks?|months?))\b"
+)
+
+# Words that say what kind of search this is rather than what to search for
+FILLER_WORDS = GENERIC_WORDS | QUESTION_WORDS | CONNECTOR_WORDS | {
+    "people", "person", "persons", "profile", "profiles", "someone", "anyone", "folks", "who", "that", "there",
+    "work", "works", "working", "employed", "located", "living", "with", "having", "for", "the", "of", "to",
+    "show", "find", "list", "get", "give", "search", "look", "looking", "please", "role", "job", "title",
+    "position", "industry", "sector", "field", "company", "about", "tell", "know",
+}
+
+# Hints used when no template matches, to guess a category with low confidence
+CATEGORY_HINTS = [
+    ("events", re.compile(rf"\b{_EVENTS}\b")),
+    ("offers", re.compile(rf"\b{_OFFERS}\b")),
+    ("members", re.compile(rf"\b{_PEOPLE}\b|\bwho (?:works?|is working)\b")),
+]
+
+
+def search_terms(query, limit=6):
+    """Distinct content words (three characters or more) of a normalized query, in order"""
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", query):
+        if len(word) >= 3 and word not in FILLER_WORDS and word not in terms:
+            terms.append(word)
+    return terms[:limit]
+
+
+def time_relative(query):
+    """True if a normalized query names a date relative to today ("events this week")"""
+    return RELATIVE_DATE_RE.search(query) is not None
+
+
+class Route:
+    """One anchored query template mapping named groups to classifier filters"""
+
+    def __init__(self, name, category, pattern, confidence=0.95, defaults=None):
+        self.name = name
+        self.category = category
+        self.regex = re.compile(rf"^{_LEAD}{pattern}{_TAIL}$")
+        self.confidence = confidence
+        self.defaults = defaults or {}
+
+    def match(self, query):
+        match = self.regex.match(query)
+        if match is None:
+            return None
+        filters = dict(self.defaults)
+        for key, value in match.groupdict().items():
+            if value:
+                filters[key] = value.strip()
+        return filters
+
+
+ROUTES = [
+    # Events
+    Route("events_timeframe", "events", rf"{_TIMEFRAME} {_EVENTS}"),
+    Route("events_on_date", "events", rf"(?:{_TIMEFRAME} )?{_EVENTS} (?:on|for|dated) (?P<date>\d{{4}}-\d{{2}}-\d{{2}})"),
+    Route("events_relative_day", "events", rf"{_EVENTS} (?P<day>today|tomorrow)|(?P<day2>today|tomorrow)(?:'s| s)? {_EVENTS}"),
+    Route(
+        "events_by_host",
+        "events",
+        rf"(?:{_TIMEFRAME} )?{_EVENTS} (?:arranged|organi[sz]ed|hosted|run|conducted)? ?by (?:the )?(?P<host_name>{_PHRASE})(?: vertical| team| chapter)?",
+    ),
+    Route("events_keyword", "events", rf"(?:{_TIMEFRAME} )?(?P<keyword>{_PHRASE}) {_EVENTS}", confidence=0.85),
+    Route("events_about", "events", rf"(?:{_TIMEFRAME} )?{_EVENTS} (?:about|on|related to|for) (?P<keyword>{_PHRASE})", confidence=0.85),
+    Route("events_plain", "events", _EVENTS, confidence=0.9),
+    # Offers
+    Route("offers_keyword", "offers", rf"{_OFFERS} (?:related to|for|on|about|at|in) (?P<keyword>{_PHRASE})"),
+    Route("offers_prefixed", "offers", rf"(?P<keyword>{_PHRASE}) {_OFFERS}", confidence=0.85),
+    Route("offers_plain", "offers", _OFFERS, confidence=0.9),
+    # Members
+    Route("members_industry", "members", rf"{_PEOPLE} (?:in|from|working in) (?:the )?(?P<industry>{_PHRASE}) (?:industry|sector)"),
+    Route("members_job_title", "members", rf"{_PEOPLE} (?:with|having|who have) (?:the |a )?(?:role|job|job title|title|position) (?:of |as )?(?P<job_title>{_PHRASE})"),
+    Route("members_company", "members", rf"{_PEOPLE} (?:who works? |working |employed )?at (?P<company>{_PHRASE})"),
+    Route("members_location", "members", rf"{_PEOPLE} (?:based|located|living) in (?P<location>{_PHRASE})"),
+    Route("members_field", "members", rf"(?:{_PEOPLE} )?(?:who works?|working|who is working|that works?) in (?:the field of )?(?P<field>{_PHRASE})"),
+]
+
+
+class QueryRouter:
+    """Deterministic fast path that classifies obvious queries without the LLM.
+
+    `route()` returns a RouteResult with a confidence score; callers only
+    trust it above their threshold and otherwise fall back to the classifier.
+    Low-confidence results still carry a best-guess category. Per-route hit
+    counts are kept so the share of traffic each template absorbs is visible.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = routes or ROUTES
+        self._lock = threading.Lock()
+        self.hits = {route.name: 0 for route in self.routes}
+        self.fallbacks = 0
+
+    def route(self, query):
+        """Classify a normalized (lowercase, whitespace-collapsed) query"""
+        for route in self.routes:
+            filters = route.match(query)
+            if filters is None:
+                continue
+            filters = self._clean(filters)
+            if filters is None:
+                continue
+            return RouteResult(route.category, filters, route.confidence, route.name)
+
+        for category, hint in CATEGORY_HINTS:
+            if hint.search(query):
+                return RouteResult(category, {}, 0.4, None)
+        return RouteResult("general", {}, 0.0, None)
+
+    def record(self, result, used):
+        """Count a routing decision; `used` is False when the LLM was asked instead"""
+        with self._lock:
+            if used and result.route:
+                self.hits[result.route] += 1
+            else:
+                self.fallbacks += 1
+
+    def stats(self):
+        with self._lock:
+            routed = sum(self.hits.values())
+            total = routed + self.fallbacks
+            return {
+                "routes": {name: count for name, count in self.hits.items() if count},
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(routed / total, 4) if total else 0.0,
+            }
+
+    def _clean(self, filters):
+        if "timeframe" in filters:
+            filters["timeframe"] = TIMEFRAME_ALIASES[filters["timeframe"]]
+
+        day = filters.pop("day", None) or filters.pop("day2", None)
+        if day:
+            target = datetime.now(timezone.utc).date()
+            if day == "tomorrow":
+                target += timedelta(days=1)
+            filters["date"] = target.isoformat()
+
+        if "date" in filters:
+            try:
+                datetime.strptime(filters["date"], "%Y-%m-%d")
+            except ValueError:
+                return None
+        elif re.search(r"\d{4}-\d{2}-\d{2}", " ".join(filters.values())):
+            # A malformed date slipped into a free-text group; let the LLM sort it out
+            return None
+
+        # A "topic" that is really just filler ("any events", "the offers") is no topic at all
+        for key in ("keyword", "host_name", "industry", "job_title", "company", "location", "field"):
+            if key in filters and filters[key] in GENERIC_WORDS:
+                return None
+        for key in ("keyword", "host_name", "company", "field"):
+            if key in filters and QUESTION_WORDS.intersection(filters[key].split()):
+                return None
+        for key in ("keyword", "host_name", "industry", "job_title", "company", "location", "field"):
+            if key in filters and CONNECTOR_WORDS.intersection(filters[key].split()):
+                return None
+        if "keyword" in filters:
+            words = filters["keyword"].split()
+            # Years and counts ("2026 events", "top 5 offers") are no topic either
+            if MODIFIER_WORDS.intersection(words) or any(word.isdigit() for word in words):
+                return None
+        if "keyword" in filters and re.search(rf"\b{_EVENTS}\b|\b{_OFFERS}\b|\b{_PEOPLE}\b", filters["keyword"]):
+            return None
+        return filters
@@ -0,0 +1,338 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+from table_snapshot import TableSnapshot
+
+try:
+    import numpy as np
+except ImportError:  # scoring falls back to the pure-Python loop
+    np = None
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Query terms at least this long also match longer tokens they prefix ("engineer" -> "engineering")
+MIN_PREFIX_LENGTH = 3
+# Prefix matches count for less than the exact token
+PREFIX_WEIGHT = 0.5
+# Cap on tokens a single prefix expands to, so a short term can't touch the whole vocabulary
+MAX_PREFIX_EXPANSIONS = 50
+# Below this many indexed rows the plain loop beats building and scoring arrays
+VECTOR_MIN_ROWS = 1000
+# Rows a sync re-indexes per hold of the index lock; searches wait for one batch at most
+SYNC_BATCH_SIZE = 500
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a value (None becomes no tokens)"""
+    if text is None:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def row_key(row):
+    return row.get("id")
+
+
+class BM25Index:
+    """Multi-field BM25 index with per-field boosts.
+
+    Postings map token -> {key: {field: term frequency}}, so document
+    frequency is just the size of a token's postings and stays correct as
+    rows are added, changed or removed one at a time. A search only visits
+    the postings of the query terms (and their prefix expansions) and keeps
+    the best `limit` keys with a heap.
+
+    With NumPy installed, large indexes are scored in bulk instead: each
+    token's postings become per-field arrays of row positions and term
+    frequencies (built lazily, dropped whenever the index changes), a query
+    is a handful of array operations over every row at once, and the top k
+    comes from argpartition.
+    """
+
+    def __init__(self, fields, k1=1.2, b=0.75):
+        # field -> default boost
+        self.fields = dict(fields)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        # Sorted list of every indexed token, for prefix lookups
+        self.vocabulary = []
+        self.lengths = {field: {} for field in self.fields}
+        self.total_lengths = {field: 0 for field in self.fields}
+        # key -> (field texts, tokens) of each indexed row
+        self.docs = {}
+        self._lock = threading.RLock()
+        # One sync at a time; it only takes _lock to apply changes
+        self._sync_lock = threading.Lock()
+        # Bumped on every change; the NumPy arrays are rebuilt when it moves
+        self._version = 0
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, key, row):
+        """Index or re-index a row; returns False when it is unchanged"""
+        texts = tuple(row.get(field) for field in self.fields)
+        return self._apply(key, texts, self._token_counts(texts))
+
+    def _token_counts(self, texts):
+        return tuple(Counter(tokenize(text)) for text in texts)
+
+    def _apply(self, key, texts, token_counts):
+        """add() with the row already tokenized, so only index updates happen under the lock"""
+        with self._lock:
+            indexed = self.docs.get(key)
+            if indexed is not None:
+                if indexed[0] == texts:
+                    return False
+                self.remove(key)
+
+            tokens = set()
+            for field, counts in zip(self.fields, token_counts):
+                length = sum(counts.values())
+                self.lengths[field][key] = length
+                self.total_lengths[field] += length
+                for token, count in counts.items():
+                    token_postings = self.postings.get(token)
+                    if token_postings is None:
+                        token_postings = self.postings[token] = {}
+                        insort(self.vocabulary, token)
+                    token_postings.setdefault(key, {})[field] = count
+                    tokens.add(token)
+            self.docs[key] = (texts, tokens)
+            self._version += 1
+            return True
+
+    def remove(self, key):
+        with self._lock:
+            indexed = self.docs.pop(key, None)
+            if indexed is None:
+                return False
+            for token in indexed[1]:
+                token_postings = self.postings[token]
+                del token_postings[key]
+                if not token_postings:
+                    del self.postings[token]
+                    del self.vocabulary[bisect_left(self.vocabulary, token)]
+            for field in self.fields:
+                self.total_lengths[field] -= self.lengths[field].pop(key)
+            self._version += 1
+            return True
+
+    def sync(self, rows, key=row_key):
+        """Bring the index in line with a full set of rows, touching only what changed.
+
+        The diff and the tokenizing of changed rows happen without the index
+        lock; changes are then applied SYNC_BATCH_SIZE rows at a time, so
+        searches keep running during a refresh (one posting at a time, until
+        the sync has rebuilt the NumPy arrays). Returns (changed, removed) counts.
+        """
+        with self._sync_lock:
+            seen = set()
+            changes = []
+            for row in rows:
+                row_id = key(row)
+                seen.add(row_id)
+                texts = tuple(row.get(field) for field in self.fields)
+                indexed = self.docs.get(row_id)
+                if indexed is None or indexed[0] != texts:
+                    changes.append((row_id, texts, self._token_counts(texts)))
+            stale = [row_id for row_id in list(self.docs) if row_id not in seen]
+
+            for start in range(0, len(changes), SYNC_BATCH_SIZE):
+                with self._lock:
+                    for change in changes[start:start + SYNC_BATCH_SIZE]:
+                        self._apply(*change)
+            for start in range(0, len(stale), SYNC_BATCH_SIZE):
+                with self._lock:
+                    for row_id in stale[start:start + SYNC_BATCH_SIZE]:
+                        self.remove(row_id)
+
+            if (changes or stale) and np is not None and len(self.docs) >= VECTOR_MIN_ROWS:
+                # Built without the index lock: only a sync changes the index, and this one is done
+                arrays = self._build_arrays()
+                with self._lock:
+                    if self._version == arrays[0]:
+                        self._arrays = arrays
+            return len(changes), len(stale)
+
+    def expand(self, term):
+        """Indexed tokens a query term matches, with their weight"""
+        matches = [(term, 1.0)] if term in self.postings else []
+        if len(term) >= MIN_PREFIX_LENGTH:
+            position = bisect_left(self.vocabulary, term)
+            for token in self.vocabulary[position:position + MAX_PREFIX_EXPANSIONS + 1]:
+                if not token.startswith(term):
+                    break
+                if token != term:
+                    matches.append((token, PREFIX_WEIGHT))
+        return matches
+
+    def search(self, query, limit=20, boosts=None, keys=None):
+        """Top `limit` (key, score) pairs for a free-text query, best first.
+
+        `boosts` overrides the per-field weights (fields left out are not
+        searched) and `keys` restricts the search to a subset of rows. When
+        `keys` is a dict, its values order rows with equal scores (lowest first).
+        """
+        if np is not None and len(self.docs) >= VECTOR_MIN_ROWS and not self._syncing():
+            return self.search_vectorized(query, limit, boosts, keys)
+        return self.search_python(query, limit, boosts, keys)
+
+    def _syncing(self):
+        """True while a sync has changed the index and not yet rebuilt the NumPy arrays"""
+        arrays = self._arrays
+        return self._sync_lock.locked() and (arrays is None or arrays[0] != self._version)
+
+    def search_python(self, query, limit=20, boosts=None, keys=None):
+        """search() one posting at a time"""
+        boosts = {field: boost for field, boost in (boosts or self.fields).items() if boost > 0}
+        with self._lock:
+            count = len(self.docs)
+            if not count:
+                return []
+            average_lengths = {field: (self.total_lengths[field] / count) or 1.0 for field in boosts}
+
+            scores = {}
+            for term in dict.fromkeys(tokenize(query)):
+                # Best match per row for this term, so prefix variants don't add up
+                term_scores = {}
+                for token, weight in self.expand(term):
+                    token_postings = self.postings[token]
+                    df = len(token_postings)
+                    idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                    for row_id, frequencies in token_postings.items():
+                        if keys is not None and row_id not in keys:
+                            continue
+                        tf = 0.0
+                        for field, frequency in frequencies.items():
+                            if field in boosts:
+                                norm = 1 - self.b + self.b * self.lengths[field][row_id] / average_lengths[field]
+                                tf += boosts[field] * frequency / norm
+                        if not tf:
+                            continue
+                        score = weight * idf * tf * (self.k1 + 1) / (tf + self.k1)
+                        if score > term_scores.get(row_id, 0.0):
+                            term_scores[row_id] = score
+                for row_id, score in term_scores.items():
+                    scores[row_id] = scores.get(row_id, 0.0) + score
+
+        if isinstance(keys, dict):
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -keys[item[0]]))
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def search_vectorized(self, query, limit=20, boosts=None, keys=None):
+        """search() scoring every row at once with NumPy"""
+        boosts = {field: boost for field, boost in (boosts or self.fields).items() if boost > 0}
+        with self._lock:
+            count = len(self.docs)
+            if not count or limit <= 0:
+                return []
+            row_keys, positions, norms, token_arrays = self._compiled()
+
+            scores = np.zeros(count)
+            for term in dict.fromkeys(tokenize(query)):
+                term_scores = None
+                for token, weight in self.expand(term):
+                    df = len(self.postings[token])
+                    idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                    tf = np.zeros(count)
+                    for field, (rows, frequencies) in self._token_arrays(token, positions, token_arrays).items():
+                        if field in boosts:
+                            tf[rows] += boosts[field] * frequencies / norms[field][rows]
+                    token_scores = weight * idf * tf * (self.k1 + 1) / (tf + self.k1)
+                    term_scores = token_scores if term_scores is None else np.maximum(term_scores, token_scores)
+                if term_scores is not None:
+                    scores += term_scores
+
+            if keys is not None:
+                allowed = np.zeros(count, dtype=bool)
+                allowed[[positions[key] for key in keys if key in positions]] = True
+                scores[~allowed] = 0.0
+
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+
+        if isinstance(keys, dict):
+            order = sorted(matched, key=lambda row: (-scores[row], keys[row_keys[row]]))
+        else:
+            order = sorted(matched, key=lambda row: (-scores[row], row))
+        return [(row_keys[row], float(scores[row])) for row in order]
+
+    def _compiled(self):
+        """Row keys, key positions, per-field length norms and the token array cache for this version"""
+        if self._arrays is None or self._arrays[0] != self._version:
+            self._arrays = self._build_arrays()
+        return self._arrays[1:]
+
+    def _build_arrays(self):
+        """(version, row keys, key positions, per-field length norms, empty token array cache)"""
+        version = self._version
+        row_keys = list(self.docs)
+        positions = {key: row for row, key in enumerate(row_keys)}
+        norms = {}
+        for field in self.fields:
+            lengths = np.fromiter((self.lengths[field][key] for key in row_keys), dtype=np.float64, count=len(row_keys))
+            norms[field] = 1 - self.b + self.b * lengths / ((self.total_lengths[field] / len(row_keys)) or 1.0)
+        return (version, row_keys, positions, norms, {})
+
+    def _token_arrays(self, token, positions, token_arrays):
+        """field -> (row positions, term frequencies) for one token"""
+        arrays = token_arrays.get(token)
+        if arrays is None:
+            by_field = {}
+            for key, frequencies in self.postings[token].items():
+                for field, frequency in frequencies.items():
+                    rows, counts = by_field.setdefault(field, ([], []))
+                    rows.append(positions[key])
+                    counts.append(frequency)
+            arrays = {
+                field: (np.array(rows, dtype=np.intp), np.array(counts, dtype=np.float64))
+                for field, (rows, counts) in by_field.items()
+            }
+            token_arrays[token] = arrays
+        return arrays
+
+
+def fuse(rankings, limit=20, k=60):
+    """Reciprocal rank fusion of several best-first (key, score) lists"""
+    scores = {}
+    for ranking in rankings:
+        for rank, (key, score) in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class RankedTableState:
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_key = {row_key(row): row for row in rows}
+
+
+class RankedTable(TableSnapshot):
+    """Table snapshot with a BM25 index kept in sync on every refresh"""
+
+    def __init__(self, loader, fields, ttl=300):
+        super().__init__(loader, ttl=ttl)
+        self.ranking = BM25Index(fields)
+
+    def build(self, rows):
+        self.ranking.sync(rows)
+        return RankedTableState(rows)
+
+    def all(self):
+        return list(self.state().rows)
+
+    def rank(self, query, rows=None, limit=20):
+        """Rows matching `query`, most relevant first (optionally only among `rows`)"""
+        state = self.state()
+        # Ties keep the order of `rows` (start_time for events)
+        keys = None if rows is None else {row_key(row): position for position, row in enumerate(rows)}
+        return [state.by_key[key] for key, score in self.ranking.search(query, limit, keys=keys) if key in state.by_key]
+
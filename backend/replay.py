@@ -0,0 +1,183 @@
+"""Replay a traffic capture (TRAFFIC_CAPTURE_PATH) against the chat backend.
+
+Requests are sent with their captured spacing divided by --speed, so 1 is
+real time and 10 plays an hour of traffic in six minutes. Reports latency
+percentiles and error rates per captured category, next to the latencies
+seen when the traffic was captured:
+
+    python replay.py capture.jsonl --target http://127.0.0.1:5000 --speed 5
+    python replay.py capture.jsonl --stand-ins --rows 10000 --speed 20
+
+--stand-ins drives the app in-process against the local OpenAI/Supabase
+stand-ins from benchmark.py (same latency and failure options).
+"""
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import benchmark
+from health_monitor import percentile
+
+
+def load_capture(path, limit=None):
+    """Captured requests sorted by time"""
+    entries = []
+    with open(path, encoding="utf-8") as capture_file:
+        for line in capture_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A worker killed mid-write can leave a partial last line
+                continue
+            if entry.get("query"):
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries[:limit] if limit else entries
+
+
+def replay(entries, send, speed=1.0, concurrency=64):
+    """Send every entry at its captured offset / speed; returns one outcome per entry"""
+    outcomes = [None] * len(entries)
+    lock = threading.Lock()
+    late = {"count": 0, "max_ms": 0.0}
+
+    def one(index, due):
+        entry = entries[index]
+        lag_ms = (time.monotonic() - due) * 1000
+        payload = {"query": entry["query"]}
+        if entry.get("summary_mode"):
+            payload["summary_mode"] = entry["summary_mode"]
+        started_at = time.monotonic()
+        try:
+            status, body = send(payload)
+        except Exception as e:
+            status, body = 0, {"error": str(e)}
+        outcomes[index] = {
+            "category": entry.get("category") or "error",
+            "replayed_category": body.get("category"),
+            "elapsed_ms": (time.monotonic() - started_at) * 1000,
+            "failed": status != 200 or "error" in body,
+        }
+        if lag_ms > 100:
+            with lock:
+                late["count"] += 1
+                late["max_ms"] = max(late["max_ms"], lag_ms)
+
+    first_ts = entries[0]["ts"] if entries else 0
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, entry in enumerate(entries):
+            due = started_at + (entry["ts"] - first_ts) / speed
+            pause = due - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            pool.submit(one, index, due)
+    wall = time.monotonic() - started_at
+    return outcomes, wall, late
+
+
+def summarize(entries, outcomes, wall):
+    """Per-category rows: requests, errors, error rate, replayed and captured latency percentiles"""
+    by_category = defaultdict(list)
+    captured = defaultdict(list)
+    for entry, outcome in zip(entries, outcomes):
+        by_category[outcome["category"]].append(outcome)
+        if entry.get("elapsed_ms") is not None:
+            captured[outcome["category"]].append(entry["elapsed_ms"])
+
+    rows = []
+    for category in sorted(by_category):
+        results = by_category[category]
+        latencies = sorted(result["elapsed_ms"] for result in results)
+        errors = sum(result["failed"] for result in results)
+        captured_latencies = sorted(captured[category])
+        rows.append({
+            "category": category,
+            "requests": len(results),
+            "errors": errors,
+            "error_rate": round(errors / len(results), 4),
+            "changed_category": sum(not result["failed"] and result["replayed_category"] != category for result in results),
+            "p50_ms": _round(percentile(latencies, 0.50)),
+            "p95_ms": _round(percentile(latencies, 0.95)),
+            "p99_ms": _round(percentile(latencies, 0.99)),
+            "captured_p50_ms": _round(percentile(captured_latencies, 0.50)),
+            "captured_p95_ms": _round(percentile(captured_latencies, 0.95)),
+        })
+    return rows
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def print_report(rows, wall, late):
+    columns = list(rows[0]) if rows else []
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+    total = sum(row["requests"] for row in rows)
+    print(f"{total} requests in {round(wall, 1)} s ({round(total / wall, 1) if wall else 0} rps)")
+    if late["count"]:
+        print(f"{late['count']} requests started over 100 ms late (max {round(late['max_ms'])} ms); raise --concurrency")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="JSONL file written with TRAFFIC_CAPTURE_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (1 = as captured)")
+    parser.add_argument("--concurrency", type=int, default=64, help="most requests in flight at once")
+    parser.add_argument("--limit", type=int, help="replay only the first N captured requests")
+    parser.add_argument("--target", help="URL of the deployment to replay against")
+    parser.add_argument("--stand-ins", action="store_true", help="replay in-process against the local stand-ins")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's INFO logs (--stand-ins only)")
+    # Stand-in options, as in benchmark.py
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--openai-latency-ms", type=float, default=400.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    if bool(args.target) == args.stand_ins:
+        parser.error("pass exactly one of --target and --stand-ins")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    args.openai_failure_rate = args.supabase_failure_rate = args.failure_rate
+    args.openai_port = args.supabase_port = 0
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    entries = load_capture(args.capture, args.limit)
+    if not entries:
+        raise SystemExit(f"No requests in {args.capture}")
+    span = entries[-1]["ts"] - entries[0]["ts"]
+    print(f"Replaying {len(entries)} requests captured over {round(span, 1)} s at {args.speed}x")
+
+    if args.target:
+        send = benchmark.http_sender(args.target, args.concurrency)
+    else:
+        openai, supabase = benchmark.start_stand_ins(args)
+        send = benchmark.in_process_sender(benchmark.stand_in_env(openai, supabase, cold=args.cold), args.verbose)
+
+    outcomes, wall, late = replay(entries, send, args.speed, args.concurrency)
+
+    rows = summarize(entries, outcomes, wall)
+    if args.json:
+        print(json.dumps({"categories": rows, "wall_s": round(wall, 1), "late": late}, indent=2))
+    else:
+        print_report(rows, wall, late)
+
+
+if __name__ == "__main__":
+    main()
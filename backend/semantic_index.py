@@ -0,0 +1,343 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # semantic search is simply unavailable without NumPy
+    np = None
+
+from ranking import row_key
+
+logger = logging.getLogger(__name__)
+
+# Profile columns that describe what someone does; names and locations are left to BM25
+PROFILE_TEXT_FIELDS = ["job_title", "industry", "company", "role"]
+
+# Common abbreviations spelled out before local embedding, so "ML" finds "machine learning"
+ABBREVIATIONS = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "ds": "data science",
+    "hr": "human resources",
+    "ux": "user experience",
+    "ui": "user interface",
+    "qa": "quality assurance",
+    "pm": "product manager",
+    "vc": "venture capital",
+    "ca": "chartered accountant",
+    "it": "information technology",
+    "ceo": "chief executive officer",
+    "cto": "chief technology officer",
+    "cfo": "chief financial officer",
+    "coo": "chief operating officer",
+    "cmo": "chief marketing officer",
+    "vp": "vice president",
+    "md": "managing director",
+    "r&d": "research and development",
+    "fmcg": "fast moving consumer goods",
+}
+
+WORD_RE = re.compile(r"[a-z0-9&]+")
+
+# Below this many vectors a query is compared with all of them; above it the IVF lists are used
+IVF_MIN_ROWS = 5000
+# Coarse clusters are retrained once the index has grown this much since the last training
+IVF_RETRAIN_GROWTH = 2.0
+# Query embeddings kept per index (OpenAI embeddings cost a round-trip each)
+QUERY_CACHE_SIZE = 1000
+
+
+def profile_text(row):
+    """The text embedded for a member profile"""
+    return ". ".join(str(row[field]).strip() for field in PROFILE_TEXT_FIELDS if row.get(field))
+
+
+def expand_abbreviations(text):
+    words = WORD_RE.findall(text.lower())
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+class HashingEmbedder:
+    """Deterministic local embeddings: signed feature hashing of words and character trigrams.
+
+    Needs no network or model files, so it works offline and in tests, and
+    catches spelling variants ("engineer"/"engineering"). It has no notion of
+    synonyms beyond ABBREVIATIONS; use OpenAIEmbedder for that.
+    """
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        words = expand_abbreviations(text).split()
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API, requested in batches.
+
+    `get_client` returns the OpenAI client to use, so clients recreated
+    after a worker fork are picked up. `on_response`, if given, is called
+    with every API response (for token accounting).
+    """
+
+    def __init__(self, get_client, model="text-embedding-3-small", batch_size=100, on_response=None):
+        self.get_client = get_client
+        self.model = model
+        self.batch_size = batch_size
+        self.on_response = on_response
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text or " " for text in texts[start:start + self.batch_size]]
+            response = self.get_client().embeddings.create(model=self.model, input=batch)
+            if self.on_response:
+                self.on_response(response)
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return normalize_rows(np.array(vectors, dtype=np.float32))
+
+
+def make_embedder(provider, get_client=None, on_response=None):
+    """Embedding provider by name: "local" (hashing) or "openai"; None for "off" or without NumPy"""
+    if np is None or provider in ("", "off", "none"):
+        return None
+    if provider == "local":
+        return HashingEmbedder()
+    if provider == "openai":
+        return OpenAIEmbedder(get_client, on_response=on_response)
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """Approximate nearest-neighbour index over member profile embeddings.
+
+    Vectors live in one growable float32 matrix. Small indexes are searched
+    exactly with a single matrix-vector product; past IVF_MIN_ROWS the rows
+    are grouped around k-means centroids (IVF) and a query only scores the
+    `nprobe` closest groups.
+
+    `sync(rows)` re-embeds only profiles whose text changed, and the vectors
+    are saved to `path` so a restarted worker doesn't re-embed everything.
+    """
+
+    def __init__(self, embedder, path=None, nprobe=8, min_score=0.3):
+        self.embedder = embedder
+        self.path = path
+        self.nprobe = nprobe
+        self.min_score = min_score
+        self.keys = []
+        self.slots = {}
+        self.digests = []
+        self.vectors = None
+        self.count = 0
+        self.centroids = None
+        self.assignments = None
+        self.trained_size = 0
+        self._query_cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self):
+        return self.count
+
+    def sync(self, rows, key=row_key, text=profile_text):
+        """Match the index to the current rows, embedding only new or changed profiles.
+
+        Returns (changed, removed) counts.
+        """
+        texts = {key(row): text(row) for row in rows}
+        digests = {row_id: hashlib.sha1(value.encode()).hexdigest() for row_id, value in texts.items()}
+
+        with self._lock:
+            changed = [
+                row_id for row_id, digest in digests.items()
+                if row_id not in self.slots or self.digests[self.slots[row_id]] != digest
+            ]
+            stale = [row_id for row_id in self.slots if row_id not in digests]
+
+        # Embed outside the lock; this can be a network call
+        vectors = self.embedder.embed([texts[row_id] for row_id in changed]) if changed else None
+
+        with self._lock:
+            for row_id in stale:
+                self._remove(row_id)
+            for position, row_id in enumerate(changed):
+                self._put(row_id, digests[row_id], vectors[position])
+            if changed or stale:
+                self._update_clusters()
+                self._query_cache.clear()
+                self._save()
+        return len(changed), len(stale)
+
+    def search(self, query, limit=20, keys=None):
+        """Top `limit` (key, cosine similarity) pairs at or above min_score, best first"""
+        with self._lock:
+            if not self.count:
+                return []
+        vector = self._embed_query(query)
+
+        with self._lock:
+            candidates = self._candidates(vector)
+            if keys is not None:
+                allowed = np.array([self.keys[slot] in keys for slot in candidates], dtype=bool)
+                candidates = candidates[allowed] if len(candidates) else candidates
+            if not len(candidates):
+                return []
+
+            scores = self.vectors[candidates] @ vector
+            keep = scores >= self.min_score
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                candidates, scores = candidates[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            return [(self.keys[candidates[i]], float(scores[i])) for i in order]
+
+    def _embed_query(self, query):
+        query = " ".join(query.lower().split())
+        with self._lock:
+            vector = self._query_cache.get(query)
+            if vector is not None:
+                self._query_cache.move_to_end(query)
+                return vector
+        vector = self.embedder.embed([query])[0]
+        with self._lock:
+            self._query_cache[query] = vector
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def _candidates(self, vector):
+        """Slots to score: all of them, or those in the nprobe nearest IVF lists"""
+        if self.centroids is None:
+            return np.arange(self.count)
+        nearest = np.argsort(-(self.centroids @ vector))[:self.nprobe]
+        return np.flatnonzero(np.isin(self.assignments[:self.count], nearest))
+
+    def _put(self, row_id, digest, vector):
+        slot = self.slots.get(row_id)
+        if slot is None:
+            slot = self.count
+            if self.vectors is None or slot >= len(self.vectors):
+                self._grow(len(vector))
+            self.slots[row_id] = slot
+            self.keys.append(row_id)
+            self.digests.append(digest)
+            self.count += 1
+        else:
+            self.digests[slot] = digest
+        self.vectors[slot] = vector
+        if self.centroids is not None:
+            self.assignments[slot] = int(np.argmax(self.centroids @ vector))
+
+    def _remove(self, row_id):
+        # Move the last row into the freed slot so the matrix stays dense
+        slot = self.slots.pop(row_id)
+        last = self.count - 1
+        if slot != last:
+            moved = self.keys[last]
+            self.keys[slot] = moved
+            self.digests[slot] = self.digests[last]
+            self.vectors[slot] = self.vectors[last]
+            self.assignments[slot] = self.assignments[last]
+            self.slots[moved] = slot
+        self.keys.pop()
+        self.digests.pop()
+        self.count -= 1
+
+    def _grow(self, dim):
+        capacity = max(1024, 2 * (len(self.vectors) if self.vectors is not None else 0))
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        assignments = np.zeros(capacity, dtype=np.int32)
+        if self.vectors is not None:
+            vectors[:self.count] = self.vectors[:self.count]
+            assignments[:self.count] = self.assignments[:self.count]
+        self.vectors = vectors
+        self.assignments = assignments
+
+    def _update_clusters(self):
+        if self.count < IVF_MIN_ROWS:
+            self.centroids = None
+            self.trained_size = 0
+        elif self.centroids is None or self.count > self.trained_size * IVF_RETRAIN_GROWTH:
+            self._train()
+
+    def _train(self, iterations=10):
+        """Spherical k-means over the current vectors, about sqrt(n) clusters"""
+        data = self.vectors[:self.count]
+        clusters = max(1, int(self.count ** 0.5))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(self.count, clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            for cluster in range(clusters):
+                members = data[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = normalize_rows(centroids)
+        self.centroids = centroids
+        self.assignments[:self.count] = np.argmax(data @ centroids.T, axis=1)
+        self.trained_size = self.count
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+            with os.fdopen(handle, "wb") as f:
+                np.savez(
+                    f,
+                    embedder=np.array(self.embedder.name),
+                    keys=np.array(json.dumps(self.keys)),
+                    digests=np.array(json.dumps(self.digests)),
+                    vectors=self.vectors[:self.count],
+                )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning("Error saving semantic index: %s", e)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as saved:
+                if str(saved["embedder"]) != self.embedder.name:
+                    return
+                keys = json.loads(str(saved["keys"]))
+                digests = json.loads(str(saved["digests"]))
+                vectors = saved["vectors"]
+            for row_id, digest, vector in zip(keys, digests, vectors):
+                self._put(row_id, digest, vector)
+            self._update_clusters()
+        except Exception as e:
+            logger.warning("Error loading semantic index: %s", e)
@@ -486,615 +486,1221 @@
 
 import os
 import json
-import time  # <--- Added time module
-from flask import Flask, jsonify, request
+import functools
+import hashlib
+import logging
+import tempfile
+import uuid
+import threading
+import time
+from contextlib import contextmanager
+from flask import Blueprint, Flask, Response, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from openai import OpenAI
-from supabase import create_client, Client
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from cache import make_cache
+from canned_answers import CannedAnswers
+from classifier_prompts import CLASSIFIER_PROMPTS
+from event_store import EventStore
+from health_monitor import HealthMonitor
+from member_index import FILTER_COLUMNS, INDEXED_FIELDS, MemberIndex
+from metrics import registry
+from projections import payload_rows, prompt_json, select_columns
+from query_router import QueryRouter, search_terms, time_relative
+from ranking import RankedTable
+from semantic_index import VectorIndex, make_embedder
+from singleflight import SingleFlight
+from speculation import Speculator
+from structured_logging import bind_request_id, configure_logging, dropped_records, request_id
+from summarizer import summarize as template_summary
+from table_snapshot import fetch_all_rows
+from traffic_capture import TrafficCapture
 
 # Load environment variables
 load_dotenv()
 
+# Logs go through a queue to a background writer, as JSON on stdout (see structured_logging.py)
+configure_logging()
+logger = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-app = Flask(__name__)
+# Missing settings don't stop the worker: the clients are created on first use, and the
+# calls that need them fail and fall back like any other dependency error
+MISSING_SETTINGS = [name for name in ("OPENAI_API_KEY", "SUPABASE_URL", "SUPABASE_KEY") if not os.getenv(name)]
+if MISSING_SETTINGS:
+    logger.warning("Missing settings: %s", ", ".join(MISSING_SETTINGS))
 
-# CORS configuration for web - allow your frontend domains
-# For development, allow all localhost/127.0.0.1 variants on any port
-CORS(app, resources={
-    r"/*": {
-        "origins": "*",  # Allow all origins in development
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": False  # Must be False when origins is *
-    }
+# How long (seconds) a worker serves its in-memory member index before refreshing it
+MEMBER_INDEX_TTL = int(os.getenv("MEMBER_INDEX_TTL", "300"))
+# Same for the time-ordered event store; events change more often than profiles
+EVENT_STORE_TTL = int(os.getenv("EVENT_STORE_TTL", "60"))
+# And for the catalog of current offers
+OFFER_CATALOG_TTL = int(os.getenv("OFFER_CATALOG_TTL", "300"))
+
+# Semantic member search: "local" (offline hashing embeddings), "openai" or "off".
+# Vectors are saved to SEMANTIC_INDEX_PATH so restarts only embed changed profiles.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "local")
+SEMANTIC_INDEX_PATH = os.getenv("SEMANTIC_INDEX_PATH", os.path.join(tempfile.gettempdir(), "yi-member-vectors.npz"))
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "0.3"))
+
+# Classifier system prompt version (see classifier_prompts.py). "v1" is the original long prompt;
+# switch to the compact "v2" only once classifier_eval.py passes against the real OpenAI API
+CLASSIFIER_PROMPT_VERSION = os.getenv("CLASSIFIER_PROMPT_VERSION", "v1")
+
+# Classification cache sizing; CACHE_BACKEND=sqlite shares entries across workers
+CLASSIFIER_CACHE_TTL = int(os.getenv("CLASSIFIER_CACHE_TTL", "3600"))
+CLASSIFIER_CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", "1000"))
+
+# Queries the local router classifies with at least this confidence skip the LLM classifier
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
+
+# Pause the frontend applies before showing a hardcoded answer (the server never sleeps)
+HARDCODED_DELAY_MS = int(os.getenv("HARDCODED_DELAY_MS", "3000"))
+
+# How result summaries are written: "llm", "template" (no second OpenAI call) or "auto",
+# which uses the template for 0/1 results or once SUMMARY_LATENCY_BUDGET_MS (if set) is spent.
+# Clients can override the mode per request with "summary_mode".
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "auto")
+SUMMARY_LATENCY_BUDGET_MS = int(os.getenv("SUMMARY_LATENCY_BUDGET_MS", "0"))
+
+# LLM summaries are reused for the same query and the same top rows
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", "3600"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1000"))
+
+# Keep-alive connection pools per worker for the OpenAI and Supabase HTTP clients.
+# Size them to at least the number of threads a worker serves requests on.
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "30"))
+
+# Concurrent identical chat queries share one classification/query/summary run
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+# Opt-in speculative prefetch: when the LLM has to classify a query the router guesses is a
+# member search, fetch the profiles with one of its words in a filter column meanwhile, and pick
+# the results from them once the filters are known. Requests can also set "speculate": true.
+# SPECULATION_WORKERS caps concurrent fetches; above SPECULATION_MAX_CANDIDATES profiles the
+# candidates are dropped and the members query runs as usual.
+SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "false").lower() == "true"
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "4"))
+SPECULATION_MAX_CANDIDATES = int(os.getenv("SPECULATION_MAX_CANDIDATES", "1000"))
+
+# /api/chat/batch: most queries per request and how many run at once by default (and at most)
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "100"))
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "8"))
+
+# Seconds between background dependency probes; /health only reports their cached results
+HEALTH_PROBE_INTERVAL = int(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+
+# Add a Server-Timing header with the duration of each pipeline stage to chat responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Opt-in traffic capture for replay.py: /api/chat requests are appended to this JSONL file
+# (normalized, PII-scrubbed query, category, latency, stage timings). Empty disables it.
+# TRAFFIC_CAPTURE_SAMPLE is the fraction of requests recorded.
+TRAFFIC_CAPTURE_PATH = os.getenv("TRAFFIC_CAPTURE_PATH", "")
+TRAFFIC_CAPTURE_SAMPLE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE", "1.0"))
+
+# Routes and request hooks; create_app registers them on a Flask app
+api = Blueprint("api", __name__)
+
+
+def pooled_http_client(pool_size, timeout):
+    """httpx client that keeps up to `pool_size` connections open between requests"""
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=timeout,
+    )
+
+
+def create_openai_client():
+    # Imported here: the SDK is the slowest import of the app, and startup doesn't need it
+    from openai import OpenAI
+
+    return OpenAI(api_key=OPENAI_API_KEY, http_client=pooled_http_client(OPENAI_POOL_SIZE, OPENAI_TIMEOUT_SECONDS))
+
+
+def create_supabase_client():
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+
+    return create_client(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=SyncClientOptions(httpx_client=pooled_http_client(SUPABASE_POOL_SIZE, SUPABASE_TIMEOUT_SECONDS))
+    )
+
+
+# OpenAI and Supabase clients of this process, created on first use by process_client
+clients = {"pid": None, "openai": None, "supabase": None}
+clients_lock = threading.Lock()
+
+
+def process_client(name, create):
+    """The client `name` of this process, created with create() on first use.
+    
+    Connection pools must not be shared across processes, so a client created
+    before a fork is replaced in the child. A failed create() (say, a missing
+    setting) raises to the caller and is retried on the next call.
+    """
+    pid = os.getpid()
+    if clients["pid"] != pid or clients[name] is None:
+        with clients_lock:
+            if clients["pid"] != pid:
+                clients.update({"pid": pid, "openai": None, "supabase": None})
+            if clients[name] is None:
+                clients[name] = create()
+    return clients[name]
+
+
+def openai_client():
+    return process_client("openai", create_openai_client)
+
+
+def supabase_client():
+    return process_client("supabase", create_supabase_client)
+
+# Profile columns fetched from Supabase: what member search matches on plus what the chat cards show
+MEMBER_COLUMNS = select_columns(["id"], INDEXED_FIELDS, ["avatar_url", "updated_at"])
+
+# Embeddings of member profiles for "field"/keyword searches by meaning
+embedder = make_embedder(EMBEDDING_PROVIDER, openai_client, on_response=lambda response: record_usage("embedding", response))
+member_vectors = VectorIndex(embedder, SEMANTIC_INDEX_PATH, min_score=SEMANTIC_MIN_SCORE) if embedder else None
+
+# Inverted index over profiles for field/keyword member searches
+member_index = MemberIndex(lambda: fetch_all_rows(supabase_client(), "profiles", MEMBER_COLUMNS), ttl=MEMBER_INDEX_TTL, semantic=member_vectors)
+
+# Events sorted by start/end time for date and timeframe lookups
+event_store = EventStore(lambda: fetch_all_rows(supabase_client(), "events"), ttl=EVENT_STORE_TTL)
+
+# Current offers with a BM25 index over title and description
+offer_catalog = RankedTable(lambda: offers_query(supabase_client()).execute().data, {"title": 2.0, "description": 1.0}, ttl=OFFER_CATALOG_TTL)
+
+# (category, filters) per normalized query, so repeated queries skip the classifier call
+classification_cache = make_cache("classifier", ttl=CLASSIFIER_CACHE_TTL, max_entries=CLASSIFIER_CACHE_SIZE)
+
+# Summaries keyed by normalized query, category and the identity of the top five rows
+summary_cache = make_cache("summary", ttl=SUMMARY_CACHE_TTL, max_entries=SUMMARY_CACHE_SIZE)
+
+# Rule-based router for queries that are obvious enough to classify without the LLM
+query_router = QueryRouter()
+
+# OpenAI and Supabase reachability, probed in the background for /health
+health_monitor = HealthMonitor({
+    "openai": lambda: record_usage("health", openai_client().models.list()),
+    "supabase": lambda: supabase_client().table("profiles").select("id").limit(1).execute(),
+}, interval=HEALTH_PROBE_INTERVAL)
+
+# In-flight chat pipelines by (normalized query, summary mode), for request coalescing
+chat_flights = SingleFlight()
+
+# Background runs of guessed queries, with hit/waste accounting
+speculator = Speculator(max_workers=SPECULATION_WORKERS)
+
+# Latency per request and per pipeline stage, OpenAI token usage and rows per query, for /metrics
+request_seconds = registry.histogram("chat_request_seconds", "Chat request latency by endpoint and category", ["endpoint", "category"])
+stage_seconds = registry.histogram("chat_stage_seconds", "Latency of each chat pipeline stage", ["stage"])
+openai_calls = registry.counter("openai_calls_total", "OpenAI API calls by purpose", ["call"])
+openai_tokens = registry.counter("openai_tokens_total", "OpenAI tokens used by purpose and kind (prompt, completion, cached prompt)", ["call", "kind"])
+openai_call_tokens = registry.histogram(
+    "openai_call_tokens", "Tokens per OpenAI call by purpose and kind", ["call", "kind"],
+    buckets=(25, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800)
+)
+rows_fetched = registry.counter("query_rows_fetched_total", "Rows a query function pulled in (from Supabase or a local snapshot) to pick its results from", ["category"])
+rows_returned = registry.counter("query_rows_returned_total", "Rows query functions returned", ["category"])
+registry.gauge_callback("cache_hit_ratio", "Hit ratio of the caches and fast paths since the worker started", ["cache"], lambda: {
+    ("classifier",): classification_cache.stats()["hit_ratio"],
+    ("summary",): summary_cache.stats()["hit_ratio"],
+    ("router",): query_router.stats()["hit_rate"],
+    ("coalescing",): chat_flights.stats()["join_ratio"],
+    ("speculation",): speculator.stats()["hit_ratio"],
 })
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Rows fetched by the query function running on this thread, see instrumented_query
+query_scan = threading.local()
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Recorder of /api/chat traffic for replays, when TRAFFIC_CAPTURE_PATH is set
+traffic_capture = TrafficCapture(TRAFFIC_CAPTURE_PATH, TRAFFIC_CAPTURE_SAMPLE, names=lambda: known_member_names()) if TRAFFIC_CAPTURE_PATH else None
+# Lowercase member names of the current member index snapshot, scrubbed from captured queries
+member_names = {"state": None, "names": frozenset()}
 
-# Hardcoded Q&A responses - checked FIRST before AI processing
-HARDCODED_RESPONSES = {
-    "who is the india head of yi": {
-        "category": "general",
-        "answer": "The India head of Young Indians (Yi), an integral part of the Confederation of Indian Industry (CII), is the National Chairman, currently held by Arun Rathod for the 2026 term.",
-        "data": None
-    },
-    "who is the india head of yi?": {
-        "category": "general",
+# Warm-up progress of this worker, reported by /ready
+readiness = {"started": False, "ready": False, "warm_up_ms": None, "errors": []}
+readiness_lock = threading.Lock()
+
+# Hardcoded Q&A responses - checked FIRST before AI processing.
+# "questions" must match the whole query (ignoring case, spacing and trailing punctuation),
+# "keywords" trigger the answer when they appear anywhere in the query.
+HARDCODED_ANSWERS = [
+    {
         "answer": "The India head of Young Indians (Yi), an integral part of the Confederation of Indian Industry (CII), is the National Chairman, currently held by Arun Rathod for the 2026 term.",
-        "data": None
+        "questions": ["who is the india head of yi"],
+        "keywords": ["india head yi", "yi india head", "national chairman yi"]
     },
-    "which is the biggest yi chapter in india": {
-        "category": "general",
-        "answer": "While specific rankings fluctuate, Young Indians (Yi) chapters in major metropolitan and industrial hubs like Delhi, Mumbai, Bengaluru, Chennai, Hyderabad, Pune, and Kolkata are typically the largest, driven by high concentrations of entrepreneurs and professionals, with cities like Vadodara and Raipur also showing significant growth, though official data isn't always public. Yi's network spans many cities (over 70 chapters), so 'biggest' can mean most members or most impactful activities, but large city chapters generally lead in numbers.",
-        "data": None
-    },
-    "which is the biggest yi chapter in india?": {
-        "category": "general",
+    {
         "answer": "While specific rankings fluctuate, Young Indians (Yi) chapters in major metropolitan and industrial hubs like Delhi, Mumbai, Bengaluru, Chennai, Hyderabad, Pune, and Kolkata are typically the largest, driven by high concentrations of entrepreneurs and professionals, with cities like Vadodara and Raipur also showing significant growth, though official data isn't always public. Yi's network spans many cities (over 70 chapters), so 'biggest' can mean most members or most impactful activities, but large city chapters generally lead in numbers.",
-        "data": None
+        "questions": ["which is the biggest yi chapter in india"],
+        "keywords": ["biggest yi chapter", "largest yi chapter"]
     }
-}
+]
+
+# Compiled once: exact-question lookup plus a single-pass keyword automaton
+canned_answers = CannedAnswers(HARDCODED_ANSWERS)
+
+# System prompt for the query classifier
+CLASSIFIER_PROMPT = CLASSIFIER_PROMPTS[CLASSIFIER_PROMPT_VERSION]
 
-# Flexible keyword matching for hardcoded responses
-HARDCODED_KEYWORDS = {
-    "india head yi": "The India head of Young Indians (Yi), an integral part of the Confederation of Indian Industry (CII), is the National Chairman, currently held by Arun Rathod for the 2026 term.",
-    "yi india head": "The India head of Young Indians (Yi), an integral part of the Confederation of Indian Industry (CII), is the National Chairman, currently held by Arun Rathod for the 2026 term.",
-    "national chairman yi": "The India head of Young Indians (Yi), an integral part of the Confederation of Indian Industry (CII), is the National Chairman, currently held by Arun Rathod for the 2026 term.",
-    "biggest yi chapter": "While specific rankings fluctuate, Young Indians (Yi) chapters in major metropolitan and industrial hubs like Delhi, Mumbai, Bengaluru, Chennai, Hyderabad, Pune, and Kolkata are typically the largest, driven by high concentrations of entrepreneurs and professionals, with cities like Vadodara and Raipur also showing significant growth, though official data isn't always public. Yi's network spans many cities (over 70 chapters), so 'biggest' can mean most members or most impactful activities, but large city chapters generally lead in numbers.",
-    "largest yi chapter": "While specific rankings fluctuate, Young Indians (Yi) chapters in major metropolitan and industrial hubs like Delhi, Mumbai, Bengaluru, Chennai, Hyderabad, Pune, and Kolkata are typically the largest, driven by high concentrations of entrepreneurs and professionals, with cities like Vadodara and Raipur also showing significant growth, though official data isn't always public. Yi's network spans many cities (over 70 chapters), so 'biggest' can mean most members or most impactful activities, but large city chapters generally lead in numbers."
+# profiles columns that can be filtered with ilike; the member index filters the same ones
+MEMBER_FILTER_COLUMNS = FILTER_COLUMNS
+
+# How each summary prompt refers to the results it is given
+SUMMARY_SUBJECTS = {
+    "members": {"results": "search results", "summary": "findings"},
+    "events": {"results": "event results", "summary": "events"},
+    "offers": {"results": "offer results", "summary": "offers"},
 }
 
-@app.route("/health", methods=["GET"])
+@api.route("/health", methods=["GET"])
 def health():
-    """Health check endpoint"""
-    try:
-        # Minimal test call
-        client.models.list()
+    """Health check endpoint.
+    
+    Serves the dependency status cached by the background prober, so it never
+    calls OpenAI or Supabase itself. It answers 200 whenever the process is up
+    ("status" is "degraded" if a dependency is failing); use /ready for routing.
+    """
+    health_monitor.start()
+    return jsonify(health_report())
 
-        return jsonify({
-            "status": "ok",
-            "openai_key_loaded": True,
-            "openai_api_working": True,
-            "timestamp": datetime.utcnow().isoformat()
-        })
 
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "openai_key_loaded": OPENAI_API_KEY is not None,
-            "openai_api_working": False,
-            "error": str(e)
-        }), 500
+def health_report():
+    """Body of /health, shared with the async server"""
+    report = health_monitor.snapshot()
+    openai_status = report["dependencies"]["openai"]
+    report.update({
+        "openai_key_loaded": OPENAI_API_KEY is not None,
+        "openai_api_working": openai_status["ok"],
+        "supabase_reachable": report["dependencies"]["supabase"]["ok"],
+        "classifier_cache": classification_cache.stats(),
+        "summary_cache": summary_cache.stats(),
+        "router": query_router.stats(),
+        "coalescing": chat_flights.stats(),
+        "speculation": speculator.stats(),
+        "traffic_capture": traffic_capture.stats() if traffic_capture else None,
+        "dropped_log_records": dropped_records(),
+        "timestamp": datetime.utcnow().isoformat()
+    })
+    return report
+
+
+@api.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics of this worker"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@api.before_app_request
+def assign_request_id():
+    """Use the caller's X-Request-ID (e.g. from the load balancer) or make one up, for the logs"""
+    request_id.set(request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex[:16])
+
 
+@api.after_app_request
+def add_request_id(response):
+    response.headers["X-Request-ID"] = request_id.get()
+    return response
 
-@app.route("/api/chat", methods=["POST", "OPTIONS"])
+
+@api.teardown_app_request
+def clear_request_id(error=None):
+    # Threads are reused across requests; don't let the id leak into logs between them
+    request_id.set("-")
+
+
+@api.after_app_request
+def add_server_timing(response):
+    """Report the stages timed during this request in a Server-Timing header (if SERVER_TIMING)"""
+    timings = g.get("timings")
+    if SERVER_TIMING and timings:
+        response.headers["Server-Timing"] = ", ".join(f"{name};dur={round(ms, 1)}" for name, ms in timings)
+        # Let the frontend read the timings through the Resource Timing API
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+@api.route("/ready", methods=["GET"])
+def ready():
+    """Readiness check: 200 once this worker has warmed up, 503 until then.
+    
+    /health says whether the process is alive; /ready says whether it should get
+    traffic yet. A worker that was never warmed up starts warming up here.
+    """
+    start_warm_up()
+    status = 200 if readiness["ready"] else 503
+    return jsonify({
+        "status": "ready" if readiness["ready"] else "warming_up",
+        "warm_up_ms": readiness["warm_up_ms"],
+        "errors": readiness["errors"],
+        "pid": os.getpid()
+    }), status
+
+
+@api.route("/api/chat", methods=["POST"])
 def chat():
     """Handle AI assistant queries - both general and database-specific"""
-    # Handle preflight OPTIONS request
-    if request.method == "OPTIONS":
-        response = jsonify({"status": "ok"})
-        response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add("Access-Control-Allow-Headers", "Content-Type, Authorization")
-        response.headers.add("Access-Control-Allow-Methods", "POST, OPTIONS")
-        return response, 200
-    
+    started_at = time.monotonic()
+    user_query, summary_mode = "", SUMMARY_MODE
     try:
         data = request.json
         user_query = data.get("query", "")
+        summary_mode = data.get("summary_mode") or SUMMARY_MODE
+        
+        speculate = bool(data.get("speculate", SPECULATIVE_PREFETCH))
         
         if not user_query:
             return jsonify({"error": "Query is required"}), 400
         
-        # STEP 0: Check hardcoded responses FIRST (exact match)
-        user_query_lower = user_query.lower().strip()
-        if user_query_lower in HARDCODED_RESPONSES:
-            print(f"Hardcoded exact match found for: '{user_query}'")
-            
-            # --- DELAY ADDED HERE ---
-            time.sleep(3) 
-            # ------------------------
+        response = respond(user_query, summary_mode, started_at, speculate)
+        elapsed = time.monotonic() - started_at
+        request_seconds.observe(elapsed, endpoint="chat", category=response["category"])
+        capture_request(user_query, summary_mode, response["category"], 200, started_at)
+        logger.info("Chat request answered", extra={"category": response["category"], "elapsed_ms": round(elapsed * 1000, 1)})
+        return jsonify(response)
             
-            return jsonify(HARDCODED_RESPONSES[user_query_lower])
-        
-        # STEP 0.5: Check hardcoded keywords (partial match)
-        for keyword, answer in HARDCODED_KEYWORDS.items():
-            if keyword in user_query_lower:
-                print(f"Hardcoded keyword match found: '{keyword}' in '{user_query}'")
-                
-                # --- DELAY ADDED HERE ---
-                time.sleep(3)
-                # ------------------------
-                
-                return jsonify({
-                    "category": "general",
-                    "answer": answer,
-                    "data": None
-                })
-        
-        # Step 1: Categorize the query using AI
-        category_response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a query classifier. Categorize user queries into one of these types:
-                    - "members": queries about finding members/profiles (company, industry, role, field, location, job title, etc.)
-                    - "events": queries about events (recent, upcoming, ongoing, by date, by category, by topic/keyword, by organizer/host/vertical, etc.)
-                    - "offers": queries about benefits/offers/deals/discounts
-                    - "general": general questions not related to the above
-                    
-                    Extract ALL relevant filters from the query. Be precise:
-                    - For members: extract company, industry, role, location, job_title, field
-                      * If user mentions "role" or "job" (like "role engineer" or "job developer"), put it in job_title field
-                      * "field" is for areas of work like "data science", "machine learning", "marketing", "sales"
-                      * "industry" is for sectors like tech, healthcare, finance, etc.
-                      * "role" is only for Member/Admin type roles in the community
-                      * Examples: "find someone in data science" -> field: "data science"
-                      * "who works in ML" -> field: "machine learning"
-                    - For events: extract specific dates, timeframe (recent/upcoming/ongoing), category, organizer/host/vertical, and ALWAYS extract keywords
-                      * keyword should be the main topic/subject of events they're looking for
-                      * host_name or organizer for events arranged by specific people/organizations/verticals
-                      * Examples: "cyber security events" -> keyword: "cyber security"
-                      * "events by tech vertical" -> host_name: "tech"
-                      * "upcoming events arranged by marketing team" -> timeframe: "upcoming", host_name: "marketing"
-                      * "product management event" -> keyword: "product management"
-                      * "tech networking" -> keyword: "tech networking"
-                    - For offers: extract keywords about what type of offer/benefit they want
-                    
-                    Respond ONLY with a JSON object like:
-                    {
-                        "category": "members|events|offers|general",
-                        "filters": {
-                            "company": "exact company name if mentioned",
-                            "industry": "industry name if mentioned (e.g., tech, healthcare, finance)",
-                            "role": "Member/Admin role in community (rarely used)",
-                            "location": "location if mentioned",
-                            "job_title": "job position like engineer, developer, manager, designer, etc.",
-                            "field": "area of work like data science, ML, marketing, sales, etc.",
-                            "date": "YYYY-MM-DD if specific date mentioned",
-                            "timeframe": "recent|upcoming|ongoing",
-                            "category": "event category if mentioned",
-                            "host_name": "organizer/host/vertical name if mentioned",
-                            "keyword": "main search topic/keywords for events or offers"
-                        }
-                    }
-                    
-                    Examples:
-                    - "find members in tech industry" -> category: "members", industry: "tech"
-                    - "show me members with role engineer" -> category: "members", job_title: "engineer"
-                    - "find someone who works in data science" -> category: "members", field: "data science"
-                    - "who works in ML" -> category: "members", field: "machine learning"
-                    - "cyber security events" -> category: "events", keyword: "cyber security"
-                    - "upcoming events by tech vertical" -> category: "events", timeframe: "upcoming", host_name: "tech"
-                    - "events arranged by marketing team" -> category: "events", host_name: "marketing"
-                    - "product management event" -> category: "events", keyword: "product management"
-                    - "upcoming events" -> category: "events", timeframe: "upcoming"
-                    - "events on 2026-01-15" -> category: "events", date: "2026-01-15"
-                    - "offers related to gym" -> category: "offers", keyword: "gym"
-                    """
-                },
-                {
-                    "role": "user",
-                    "content": user_query
-                }
-            ],
-            temperature=0.3
+    except Exception as e:
+        logger.exception("Error in chat endpoint")
+        capture_request(user_query, summary_mode, None, 500, started_at)
+        return jsonify({"error": str(e)}), 500
+
+
+def capture_request(user_query, summary_mode, category, status, started_at):
+    """Record a chat request for replay.py (if TRAFFIC_CAPTURE_PATH is set)"""
+    if traffic_capture is None or not user_query:
+        return
+    stages = g.get("timings") if has_request_context() else None
+    traffic_capture.record(normalize_query(user_query), summary_mode, category, status, (time.monotonic() - started_at) * 1000, stages)
+
+
+def known_member_names():
+    """First and last names in the member index, lowercased; rebuilt when the snapshot changes"""
+    state = member_index.state()
+    if member_names["state"] is not state:
+        member_names["names"] = frozenset(
+            str(row[field]).lower() for row in state.rows for field in ("first_name", "last_name") if row.get(field)
         )
-        
-        # Parse the categorization
-        category_data = json.loads(category_response.choices[0].message.content)
-        category = category_data.get("category")
-        filters = category_data.get("filters", {})
-        
-        print(f"Query: '{user_query}'")
-        print(f"Categorized as: {category}")
-        print(f"Filters: {filters}")
-        
-        # Step 2: Handle based on category
+        member_names["state"] = state
+    return member_names["names"]
+
+
+@api.route("/api/chat/batch", methods=["POST"])
+def chat_batch():
+    """Answer a list of queries in one request.
+    
+    Body: {"queries": [...], "summary_mode", "parallelism" and "speculate" optional}.
+    Duplicate queries (after normalization) are answered once, and distinct
+    ones run concurrently, at most `parallelism` (capped at BATCH_PARALLELISM)
+    at a time. Returns one result per query, in order, each with either
+    "response" (the /api/chat body) or "error", plus its timing.
+    """
+    started_at = time.monotonic()
+    try:
+        queries, unique, summary_mode, speculate, parallelism = parse_batch(request.json or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(unique))) as pool:
+        answer = bind_request_id(lambda query: timed_respond(query, summary_mode, speculate))
+        outcomes = dict(zip(unique, pool.map(answer, unique.values())))
+    
+    logger.info("Batch answered", extra={
+        "queries": len(queries), "distinct": len(unique), "elapsed_ms": round((time.monotonic() - started_at) * 1000, 1)
+    })
+    return jsonify({
+        "results": batch_results(queries, outcomes),
+        "unique_queries": len(unique),
+        "parallelism": parallelism,
+        "elapsed_ms": round((time.monotonic() - started_at) * 1000, 1)
+    })
+
+
+def parse_batch(data):
+    """(queries, unique, summary_mode, speculate, parallelism) of a /api/chat/batch body.
+    
+    `unique` maps each distinct normalized query to its first spelling, so it is
+    answered once. Raises ValueError with the message for a 400 when the body is invalid.
+    """
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries or not all(isinstance(query, str) and query for query in queries):
+        raise ValueError("queries must be a non-empty list of strings")
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise ValueError(f"At most {BATCH_MAX_QUERIES} queries per batch")
+    
+    try:
+        parallelism = max(1, min(int(data.get("parallelism") or BATCH_PARALLELISM), BATCH_PARALLELISM))
+    except (TypeError, ValueError):
+        raise ValueError("parallelism must be a number")
+    
+    unique = {}
+    for query in queries:
+        unique.setdefault(normalize_query(query), query)
+    
+    summary_mode = data.get("summary_mode") or SUMMARY_MODE
+    speculate = bool(data.get("speculate", SPECULATIVE_PREFETCH))
+    return queries, unique, summary_mode, speculate, parallelism
+
+
+def batch_results(queries, outcomes):
+    """One result per query, in order, from the outcomes keyed by normalized query"""
+    results = []
+    seen = set()
+    for query in queries:
+        key = normalize_query(query)
+        results.append({"query": query, "duplicate": key in seen, **outcomes[key]})
+        seen.add(key)
+    return results
+
+
+def timed_respond(user_query, summary_mode, speculate=SPECULATIVE_PREFETCH):
+    """One batch item: the chat response or error, with how long it took"""
+    started_at = time.monotonic()
+    try:
+        outcome = {"response": respond(user_query, summary_mode, started_at, speculate)}
+        request_seconds.observe(time.monotonic() - started_at, endpoint="batch", category=outcome["response"]["category"])
+    except Exception as e:
+        logger.exception("Error in batch item", extra={"query": user_query})
+        outcome = {"error": str(e)}
+    outcome["elapsed_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    return outcome
+
+
+def respond(user_query, summary_mode, started_at, speculate=SPECULATIVE_PREFETCH):
+    """The /api/chat response body for a query: hardcoded, or from a (possibly shared) pipeline run"""
+    # STEP 0: Check hardcoded responses FIRST
+    hardcoded = find_hardcoded(user_query)
+    if hardcoded:
+        return hardcoded
+    
+    if not COALESCE_REQUESTS:
+        return answer_query(user_query, summary_mode, started_at, speculate)
+    
+    # Identical queries already being answered are joined instead of run again
+    response, shared = chat_flights.do(
+        (normalize_query(user_query), summary_mode),
+        lambda: answer_query(user_query, summary_mode, started_at, speculate)
+    )
+    if shared:
+        logger.debug("Joined in-flight request", extra={"query": user_query})
+    return response
+
+
+def answer_query(user_query, summary_mode, started_at, speculate=False):
+    """Classify, query and summarize one chat query; returns the /api/chat response body"""
+    # Step 1: Categorize the query
+    speculation = None
+    routed = route_query(user_query)
+    if routed is None and speculate:
+        # The LLM has to classify this one; guess and start querying in the meantime
+        speculation = start_speculation(user_query)
+    category, filters = routed or classify_query(user_query)
+    
+    logger.debug("Query categorized", extra={"query": user_query, "category": category, "filters": filters})
+    
+    # Step 2: Handle based on category
+    hit = False
+    if speculation is not None:
+        use = None
         if category == "members":
-            results = query_members(filters)
-            ai_response = generate_members_response(user_query, results)
-            return jsonify({
-                "category": "members",
-                "answer": ai_response,
-                "data": results
-            })
-            
-        elif category == "events":
-            results = query_events(filters)
-            ai_response = generate_events_response(user_query, results)
-            return jsonify({
-                "category": "events",
-                "answer": ai_response,
-                "data": results
-            })
+            use = lambda candidates: pick_member_candidates(candidates, speculation.guess, filters)
+        hit, results = speculator.resolve(speculation, use)
+        logger.debug("Speculative query resolved", extra={"terms": speculation.guess, "used": hit})
+    
+    if category in QUERY_FUNCTIONS:
+        if not hit:
+            results = QUERY_FUNCTIONS[category](filters)
+        ai_response = summarize_results(category, user_query, results, summary_mode, started_at)
+        return {
+            "category": category,
+            "answer": ai_response,
+            "data": payload_rows(category, results)
+        }
+    
+    # For general queries, just use GPT directly
+    with timed_stage("general"):
+        general_response = openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=general_messages(user_query),
+            temperature=0.7
+        )
+    record_usage("general", general_response)
+    
+    return {
+        "category": "general",
+        "answer": general_response.choices[0].message.content,
+        "data": None
+    }
+
+
+def sse_event(event, payload):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@api.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """Streaming variant of /api/chat using Server-Sent Events.
+    
+    Emits a "data" event with the category and results as soon as they are
+    known, then "token" events with pieces of the answer as OpenAI generates
+    them, and finally "done" with the full answer (or "error").
+    """
+    started_at = time.monotonic()
+    data = request.json or {}
+    user_query = data.get("query", "")
+    summary_mode = data.get("summary_mode") or SUMMARY_MODE
+    
+    if not user_query:
+        return jsonify({"error": "Query is required"}), 400
+    
+    # The stream is produced after the request has been torn down, so carry its id over
+    stream_request_id = request_id.get()
+    
+    def generate():
+        request_id.set(stream_request_id)
+        try:
+            hardcoded = find_hardcoded(user_query)
+            if hardcoded:
+                yield sse_event("data", {"category": hardcoded["category"], "data": hardcoded["data"]})
+                yield sse_event("token", {"text": hardcoded["answer"]})
+                yield sse_event("done", {"answer": hardcoded["answer"]})
+                return
             
-        elif category == "offers":
-            results = query_offers(filters)
-            ai_response = generate_offers_response(user_query, results)
-            return jsonify({
-                "category": "offers",
-                "answer": ai_response,
-                "data": results
-            })
+            category, filters = categorize_query(user_query)
+            logger.debug("Streaming query categorized", extra={"query": user_query, "category": category, "filters": filters})
             
-        else:  # general
-            # For general queries, just use GPT directly
-            general_response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful AI assistant for a professional community platform. Be friendly, concise, and helpful."
-                    },
-                    {
-                        "role": "user",
-                        "content": user_query
-                    }
-                ],
-                temperature=0.7
-            )
+            if category in QUERY_FUNCTIONS:
+                results = QUERY_FUNCTIONS[category](filters)
+                yield sse_event("data", {"category": category, "data": payload_rows(category, results)})
+                if use_template_summary(summary_mode, results, started_at):
+                    pieces = [template_summary(category, results)]
+                else:
+                    pieces = stream_summary(category, user_query, results)
+                stage = "summarize"
+            else:
+                yield sse_event("data", {"category": "general", "data": None})
+                pieces = stream_general(user_query)
+                category = stage = "general"
             
-            return jsonify({
-                "category": "general",
-                "answer": general_response.choices[0].message.content,
-                "data": None
-            })
+            answer = []
+            stage_started_at = time.monotonic()
+            for piece in pieces:
+                answer.append(piece)
+                yield sse_event("token", {"text": piece})
+            stage_seconds.observe(time.monotonic() - stage_started_at, stage=stage)
+            yield sse_event("done", {"answer": "".join(answer)})
+            elapsed = time.monotonic() - started_at
+            request_seconds.observe(elapsed, endpoint="stream", category=category)
+            logger.info("Chat stream answered", extra={"category": category, "elapsed_ms": round(elapsed * 1000, 1)})
             
-    except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        except Exception as e:
+            logger.exception("Error in chat stream endpoint")
+            yield sse_event("error", {"error": str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def warm_up():
+    """Load the local snapshots and open pooled connections before real traffic arrives"""
+    started_at = time.monotonic()
+    errors = []
+    
+    # Loading the snapshots also opens the Supabase connections
+    for snapshot in (member_index, event_store, offer_catalog):
+        try:
+            snapshot.state()
+        except Exception as e:
+            logger.warning("Error warming up %s: %s", type(snapshot).__name__, e)
+            errors.append(f"{type(snapshot).__name__}: {str(e)}")
+    
+    # First health probe: a cheap call to each dependency that leaves a TLS connection in each pool
+    health_monitor.probe()
+    for name, dependency in health_monitor.snapshot()["dependencies"].items():
+        if not dependency["ok"]:
+            logger.warning("Error warming up %s connection: %s", name, dependency["error"])
+            errors.append(f"{name}: {dependency['error']}")
+    
+    # Ready even if a dependency failed: requests fall back the same way they would later
+    readiness["errors"] = errors
+    readiness["warm_up_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    readiness["ready"] = True
+    logger.info("Worker warmed up", extra={"warm_up_ms": readiness["warm_up_ms"], "errors": errors})
+
+
+def start_warm_up():
+    """Run warm_up once per worker in a background thread"""
+    with readiness_lock:
+        if readiness["started"]:
+            return
+        readiness["started"] = True
+    threading.Thread(target=warm_up, daemon=True).start()
+    health_monitor.start()
+
+
+@contextmanager
+def timed_stage(name):
+    """Time a pipeline stage for /metrics and, inside a request, its Server-Timing header"""
+    stage_started_at = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - stage_started_at
+        stage_seconds.observe(elapsed, stage=name)
+        if has_request_context():
+            g.setdefault("timings", []).append((name, elapsed * 1000))
+
+
+def record_usage(call, response):
+    """Count an OpenAI call and the tokens it used"""
+    openai_calls.inc(call=call)
+    count_tokens(call, response)
+
+
+def count_tokens(call, response):
+    """Add the token usage of a response (or of the final chunk of a stream) to /metrics"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    tokens = {
+        "prompt": usage.prompt_tokens or 0,
+        # Embedding responses have no completion
+        "completion": getattr(usage, "completion_tokens", None) or 0,
+        # Prompt tokens served from OpenAI's prompt cache (already included in "prompt")
+        "cached": getattr(details, "cached_tokens", None) or 0,
+    }
+    for kind, count in tokens.items():
+        openai_tokens.inc(count, call=call, kind=kind)
+        openai_call_tokens.observe(count, call=call, kind=kind)
+
+
+def instrumented_query(category):
+    """Decorator for query functions: times them and counts rows fetched versus returned"""
+    def decorate(query_function):
+        @functools.wraps(query_function)
+        def wrapper(filters):
+            query_scan.fetched = 0
+            with timed_stage(f"query_{category}"):
+                results = query_function(filters)
+            rows_fetched.inc(query_scan.fetched, category=category)
+            rows_returned.inc(len(results), category=category)
+            return results
+        return wrapper
+    return decorate
+
+
+def note_fetched(count):
+    """Record rows the current query function pulled in"""
+    query_scan.fetched = getattr(query_scan, "fetched", 0) + count
+
+
+@timed_stage("hardcoded")
+def find_hardcoded(user_query):
+    """Return the canned response for a hardcoded question, or None"""
+    entry, matched = canned_answers.match(user_query)
+    if entry is None:
+        return None
+    
+    logger.debug("Hardcoded match", extra={"match": matched, "query": user_query})
+    return {
+        "category": "general",
+        "answer": entry["answer"],
+        "data": None,
+        # The client pauses this long before showing the answer, so it doesn't feel canned
+        "delay_ms": HARDCODED_DELAY_MS
+    }
+
+
+@timed_stage("route")
+def route_query(user_query):
+    """(category, filters) from the local router, or None when it isn't confident enough"""
+    route = query_router.route(normalize_query(user_query))
+    if route.confidence >= ROUTER_MIN_CONFIDENCE:
+        query_router.record(route, used=True)
+        logger.debug("Routed locally", extra={"route": route.route})
+        return route.category, route.filters
+    
+    query_router.record(route, used=False)
+    return None
+
+
+def speculation_guess(user_query):
+    """Search terms to fetch member candidates for, or None unless the router guesses a member search.
+    
+    Events and offers come from in-memory snapshots, so there is no round-trip to overlap for them.
+    """
+    normalized = normalize_query(user_query)
+    if query_router.route(normalized).category != "members":
+        return None
+    return search_terms(normalized) or None
 
 
+def start_speculation(user_query):
+    """Fetch member candidates in the background; None when there is no guess or no free worker"""
+    terms = speculation_guess(user_query)
+    if terms is None:
+        return None
+    return speculator.start(terms, bind_request_id(lambda: member_candidates_query(supabase_client(), terms).execute().data))
+
+
+def member_candidates_query(db, terms):
+    """profiles with any of `terms` in a filter column (works with the sync and async clients)"""
+    conditions = ",".join(f"{column}.ilike.%{term}%" for term in terms for column in MEMBER_FILTER_COLUMNS)
+    return db.table("profiles").select(MEMBER_COLUMNS).or_(conditions).limit(SPECULATION_MAX_CANDIDATES + 1)
+
+
+def pick_member_candidates(candidates, terms, filters):
+    """What the members query returns for `filters`, picked from the candidates; None if they may miss a match.
+    
+    A profile passing the column filters contains each filter value, so it is among
+    the candidates whenever one of the values contains one of the terms.
+    """
+    columns = [column for column in MEMBER_FILTER_COLUMNS if filters.get(column)]
+    if filters.get("field") or (filters.get("keyword") and not columns):
+        # Answered from the member index, not the database
+        return None
+    if len(candidates) > SPECULATION_MAX_CANDIDATES:
+        return None
+    values = {column: str(filters[column]).lower() for column in columns}
+    if not any(term in value for value in values.values() for term in terms):
+        return None
+    
+    results = [
+        row for row in candidates
+        if all(value in str(row.get(column) or "").lower() for column, value in values.items())
+    ][:20]
+    rows_fetched.inc(len(candidates), category="members")
+    rows_returned.inc(len(results), category="members")
+    return results
+
+
+def categorize_query(user_query):
+    """Categorize a query - local fast path first, AI (or a cached classification) otherwise"""
+    return route_query(user_query) or classify_query(user_query)
+
+
+def normalize_query(query):
+    """Lowercase, trim and collapse whitespace so equivalent queries share cache entries"""
+    return " ".join(query.lower().split()).strip(" ?!.")
+
+
+def classification_cache_key(user_query):
+    """Cached classifications are per prompt version, so switching versions never serves stale ones.
+    
+    Queries naming a relative date ("events this week") are also per UTC day: the
+    classifier turns them into dates that stop being right after midnight.
+    """
+    query = normalize_query(user_query)
+    if time_relative(query):
+        return f"{CLASSIFIER_PROMPT_VERSION}:{datetime.now(timezone.utc).date().isoformat()}:{query}"
+    return f"{CLASSIFIER_PROMPT_VERSION}:{query}"
+
+
+def classifier_messages(user_query):
+    return [
+        {
+            "role": "system",
+            "content": CLASSIFIER_PROMPT
+        },
+        {
+            "role": "user",
+            "content": user_query
+        }
+    ]
+
+
+def parse_classification(content):
+    """(category, filters) from the classifier's JSON reply"""
+    category_data = json.loads(content)
+    return category_data.get("category"), category_data.get("filters", {})
+
+
+@timed_stage("classify")
+def classify_query(user_query):
+    """Categorize a query with gpt-4o-mini, reusing recent classifications of the same query"""
+    cache_key = classification_cache_key(user_query)
+    cached = classification_cache.get(cache_key)
+    if cached is not None:
+        return cached["category"], cached["filters"]
+    
+    category_response = openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=classifier_messages(user_query),
+        temperature=0.3
+    )
+    record_usage("classify", category_response)
+    
+    # Parse the categorization
+    category, filters = parse_classification(category_response.choices[0].message.content)
+    
+    classification_cache.set(cache_key, {"category": category, "filters": filters})
+    return category, filters
+
+
+def members_query(db, filters):
+    """profiles select with the column filters applied (works with the sync and async clients)"""
+    query = db.table("profiles").select(MEMBER_COLUMNS)
+    
+    # Apply specific column filters
+    for column in MEMBER_FILTER_COLUMNS:
+        if filters.get(column):
+            query = query.ilike(column, f"%{filters[column]}%")
+    
+    return query.limit(20)
+
+
+def search_members_locally(filters):
+    """(rows, candidate rows ranked) for field/keyword member searches from the index; None if the database is needed"""
+    # NEW: Field/area of work filter (searches across job_title and industry)
+    if filters.get("field"):
+        return member_index.search_field(filters["field"], filters)
+    
+    # Keyword search across multiple fields (only if no specific filters)
+    has_filters = any(filters.get(column) for column in MEMBER_FILTER_COLUMNS)
+    if filters.get("keyword") and not has_filters:
+        return member_index.search_keyword(filters["keyword"])
+    
+    return None
+
+
+@instrumented_query("members")
 def query_members(filters):
     """Query the profiles table based on filters"""
     try:
-        query = supabase.table("profiles").select("*")
-        
-        has_filters = False
-        
-        # Apply specific column filters
-        if filters.get("company"):
-            query = query.ilike("company", f"%{filters['company']}%")
-            has_filters = True
-        
-        if filters.get("industry"):
-            query = query.ilike("industry", f"%{filters['industry']}%")
-            has_filters = True
-        
-        if filters.get("role"):
-            query = query.ilike("role", f"%{filters['role']}%")
-            has_filters = True
+        answer = search_members_locally(filters)
+        if answer is not None:
+            # Nothing was downloaded; count the indexed rows the search ranked instead
+            results, candidates = answer
+            note_fetched(candidates)
+            return results
         
-        if filters.get("location"):
-            query = query.ilike("location", f"%{filters['location']}%")
-            has_filters = True
+        results = members_query(supabase_client(), filters).execute().data
+        note_fetched(len(results))
+        return results
         
-        if filters.get("job_title"):
-            query = query.ilike("job_title", f"%{filters['job_title']}%")
-            has_filters = True
-        
-        # NEW: Field/area of work filter (searches across job_title and industry)
-        if filters.get("field"):
-            field = filters["field"].lower()
-            results = query.execute()
-            
-            # Score-based matching for field
-            scored_results = []
-            for member in results.data:
-                score = 0
-                job_title = str(member.get("job_title", "")).lower()
-                industry = str(member.get("industry", "")).lower()
-                company = str(member.get("company", "")).lower()
-                
-                # Check for field matches
-                field_words = field.split()
-                for word in field_words:
-                    if len(word) > 2:
-                        if word in job_title:
-                            score += 10
-                        if word in industry:
-                            score += 5
-                        if word in company:
-                            score += 2
-                
-                # Boost for exact or close matches
-                if field in job_title:
-                    score += 20
-                if field in industry:
-                    score += 15
-                
-                if score > 0:
-                    scored_results.append((score, member))
-            
-            # Sort by score and return
-            scored_results.sort(key=lambda x: x[0], reverse=True)
-            return [member for score, member in scored_results[:20]]
-        
-        # Keyword search across multiple fields (only if no specific filters)
-        if filters.get("keyword") and not has_filters:
-            keyword = filters["keyword"]
-            results = query.execute()
-            # Filter in Python for keyword matching across fields
-            filtered = [
-                r for r in results.data 
-                if any(keyword.lower() in str(r.get(field, "")).lower() 
-                       for field in ["first_name", "last_name", "full_name", "company", "industry", "job_title", "location", "role"])
-            ]
-            return filtered[:20]
-        
-        results = query.limit(20).execute()
-        return results.data
-        
-    except Exception as e:
-        print(f"Error querying members: {str(e)}")
+    except Exception:
+        logger.exception("Error querying members")
         return []
 
 
+@instrumented_query("events")
 def query_events(filters):
     """Query the events table based on filters"""
     try:
-        query = supabase.table("events").select("*")
-        
-        now = datetime.utcnow()
-        has_time_filter = False
+        now = datetime.now(timezone.utc)
+        events = None
         
         # Specific date filter takes priority
         if filters.get("date"):
             try:
                 # Parse the date and create a range for the entire day
-                target_date = datetime.fromisoformat(filters["date"])
+                target_date = datetime.fromisoformat(filters["date"]).replace(tzinfo=timezone.utc)
                 start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
                 end_of_day = target_date.replace(hour=23, minute=59, second=59, microsecond=999999)
                 
-                query = query.gte("start_time", start_of_day.isoformat())
-                query = query.lte("start_time", end_of_day.isoformat())
-                has_time_filter = True
+                events = event_store.starting_between(start_of_day, end_of_day)
             except Exception as e:
-                print(f"Error parsing date: {e}")
+                logger.warning("Error parsing date %r: %s", filters["date"], e)
         
         # Handle timeframe filters (only if no specific date)
         elif filters.get("timeframe"):
             if filters["timeframe"] == "recent":
                 # Events that ended in the last 7 days
                 past_date = now - timedelta(days=7)
-                query = query.gte("start_time", past_date.isoformat())
-                query = query.lte("start_time", now.isoformat())
-                has_time_filter = True
+                events = event_store.starting_between(past_date, now)
             
             elif filters["timeframe"] == "upcoming":
                 # Events starting in the future
-                query = query.gte("start_time", now.isoformat())
-                has_time_filter = True
+                events = event_store.starting_after(now)
             
             elif filters["timeframe"] == "ongoing":
-                # Events that are currently happening
-                query = query.lte("start_time", now.isoformat())
-                # Also check if end_time is in the future (if exists)
-                results = query.execute()
-                filtered = [
-                    r for r in results.data 
-                    if r.get("end_time") and datetime.fromisoformat(r["end_time"].replace("Z", "+00:00")) >= now
-                ]
-                return filtered[:20]
+                # Events that have started and whose end_time is still in the future
+                events = event_store.ongoing(now)
+                note_fetched(len(events))
+                return events[:20]
+        
+        # No time filter: search every event, earliest first
+        if events is None:
+            events = event_store.all()
+        note_fetched(len(events))
         
         # Category filter
         if filters.get("category"):
-            query = query.ilike("category", f"%{filters['category']}%")
+            category_filter = filters["category"].lower()
+            events = [e for e in events if category_filter in str(e.get("category") or "").lower()]
         
         # NEW: Host/Organizer/Vertical filter
         if filters.get("host_name"):
             host_filter = filters["host_name"].lower()
-            print(f"Filtering events by host: '{host_filter}'")
-            
-            # Get events based on time filter if any
-            if has_time_filter:
-                results = query.execute()
-            else:
-                results = query.limit(200).execute()
             
             # Filter by host_name
             filtered_results = []
-            for event in results.data:
+            for event in events:
                 host_name = str(event.get("host_name", "")).lower()
                 organizer = str(event.get("organizer", "")).lower()
                 
                 if host_filter in host_name or host_filter in organizer:
                     filtered_results.append(event)
             
-            print(f"Found {len(filtered_results)} events by host '{host_filter}'")
+            logger.debug("Filtered events by host", extra={"host": host_filter, "rows": len(filtered_results)})
             return filtered_results[:20]
         
         # Keyword search with robust scoring (applied after initial filtering)
         if filters.get("keyword"):
             keyword = filters["keyword"].lower()
-            # If no time filter was applied, get all events
-            if not has_time_filter:
-                results = query.limit(200).execute()  # Get more events for better matching
-            else:
-                results = query.execute()
-            
-            print(f"Searching events with keyword: '{keyword}'")
-            print(f"Total events to search: {len(results.data)}")
-            
-            # Score each event based on relevance
-            scored_results = []
-            for event in results.data:
-                score = 0
-                title = str(event.get("title", "")).lower()
-                description = str(event.get("description", "")).lower()
-                category = str(event.get("category", "")).lower()
-                location = str(event.get("location_name", "")).lower()
-                host = str(event.get("host_name", "")).lower()
-                
-                # Exact match in title gets highest score
-                if keyword == title:
-                    score += 100
-                elif keyword in title:
-                    score += 50
-                
-                # Partial word matches in title
-                search_words = keyword.split()
-                for word in search_words:
-                    if len(word) > 2:  # Skip very short words
-                        if word in title:
-                            score += 20
-                        if word in description:
-                            score += 10
-                        if word in category:
-                            score += 15
-                        if word in location:
-                            score += 8
-                        if word in host:
-                            score += 5
-                
-                # Boost for category relevance
-                if keyword in category or category in keyword:
-                    score += 25
-                
-                if score > 0:
-                    scored_results.append((score, event))
             
-            print(f"Found {len(scored_results)} matching events")
-            
-            # Sort by score (highest first) and return
-            scored_results.sort(key=lambda x: x[0], reverse=True)
-            return [event for score, event in scored_results[:20]]
+            # BM25 over title, category, location, host and description
+            results = event_store.rank(keyword, events)
+            logger.debug("Ranked events", extra={"keyword": keyword, "candidates": len(events), "rows": len(results)})
+            return results
         
-        results = query.order("start_time", desc=False).limit(20).execute()
-        return results.data
+        return events[:20]
         
-    except Exception as e:
-        print(f"Error querying events: {str(e)}")
+    except Exception:
+        logger.exception("Error querying events")
         return []
 
 
+def offers_query(db):
+    """benefits select for offers that haven't expired (works with the sync and async clients)"""
+    # All columns, as for events: the optional promo fields (code, promo_code, link) aren't on
+    # every benefits table, and payload_rows() trims the rows for the browser anyway
+    query = db.table("benefits").select("*").eq("type", "offer")
+    
+    # Only show non-expired offers
+    now = datetime.utcnow().date().isoformat()
+    return query.or_(f"expiration_date.gte.{now},expiration_date.is.null")
+
+
+def current_offers(offers):
+    """Drop offers whose expiration_date has passed"""
+    today = datetime.utcnow().date().isoformat()
+    return [offer for offer in offers if not offer.get("expiration_date") or str(offer["expiration_date"])[:10] >= today]
+
+
+@instrumented_query("offers")
 def query_offers(filters):
     """Query the benefits table based on filters"""
     try:
-        query = supabase.table("benefits").select("*").eq("type", "offer")
+        # Offers come from the per-worker catalog; expiry is re-checked since it was loaded
+        offers = current_offers(offer_catalog.all())
+        note_fetched(len(offers))
         
-        # Only show non-expired offers
-        now = datetime.utcnow().date().isoformat()
-        query = query.or_(f"expiration_date.gte.{now},expiration_date.is.null")
+        search_term = filters.get("category") or filters.get("keyword")
+        if search_term:
+            return offer_catalog.rank(search_term.lower(), offers)
         
-        # Get all offers first
-        results = query.execute()
+        return offers[:20]
         
-        # Apply keyword/category filtering
-        if filters.get("category") or filters.get("keyword"):
-            search_term = (filters.get("category") or filters.get("keyword")).lower()
-            
-            # Score each offer based on relevance
-            scored_results = []
-            for offer in results.data:
-                score = 0
-                title = str(offer.get("title", "")).lower()
-                description = str(offer.get("description", "")).lower()
-                
-                # Exact match in title gets highest score
-                if search_term in title:
-                    score += 10
-                
-                # Words match in title
-                search_words = search_term.split()
-                for word in search_words:
-                    if word in title:
-                        score += 5
-                    if word in description:
-                        score += 2
-                
-                if score > 0:
-                    scored_results.append((score, offer))
-            
-            # Sort by score (highest first) and return
-            scored_results.sort(key=lambda x: x[0], reverse=True)
-            return [offer for score, offer in scored_results[:20]]
-        
-        return results.data[:20]
-        
-    except Exception as e:
-        print(f"Error querying offers: {str(e)}")
+    except Exception:
+        logger.exception("Error querying offers")
         return []
 
 
-def generate_members_response(query, results):
-    """Generate natural language response for member queries"""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant. Given a user query and search results, provide a natural, friendly response summarizing the findings. Be concise but informative. Use PLAIN TEXT ONLY - no markdown, no asterisks, no special formatting. Just simple conversational text."
-                },
-                {
-                    "role": "user",
-                    "content": f"Query: {query}\n\nResults: {json.dumps(results[:5])}\n\nProvide a friendly summary of these members using plain text only (no markdown formatting)."
-                }
-            ],
-            temperature=0.7
-        )
-        return response.choices[0].message.content
-    except:
-        return f"Found {len(results)} members matching your criteria."
+# Query function for each data category
+QUERY_FUNCTIONS = {
+    "members": query_members,
+    "events": query_events,
+    "offers": query_offers,
+}
+
+
+def general_messages(query):
+    """Prompt for general questions that don't need any community data"""
+    return [
+        {
+            "role": "system",
+            "content": "You are a helpful AI assistant for a professional community platform. Be friendly, concise, and helpful."
+        },
+        {
+            "role": "user",
+            "content": query
+        }
+    ]
+
+
+def summary_messages(category, query, results):
+    """Prompt asking gpt-4o-mini to summarize the top results of a members/events/offers query"""
+    subject = SUMMARY_SUBJECTS[category]
+    return [
+        {
+            "role": "system",
+            "content": f"You are a helpful assistant. Given a user query and {subject['results']}, provide a natural, friendly response summarizing the {subject['summary']}. Be concise but informative. Use PLAIN TEXT ONLY - no markdown, no asterisks, no special formatting. Just simple conversational text."
+        },
+        {
+            "role": "user",
+            "content": f"Query: {query}\n\nResults: {prompt_json(category, results)}\n\nProvide a friendly summary of these {category} using plain text only (no markdown formatting)."
+        }
+    ]
 
 
-def generate_events_response(query, results):
-    """Generate natural language response for event queries"""
+def results_fingerprint(results):
+    """Identity of the rows a summary is written from: id and updated_at of the top five.
+    
+    Rows without updated_at fall back to a digest of their content, so an edited row
+    always produces a new fingerprint and stale summaries are never served.
+    """
+    identity = []
+    for row in results[:5]:
+        version = row.get("updated_at") or hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+        identity.append([row.get("id"), version])
+    return hashlib.sha1(json.dumps(identity, default=str).encode()).hexdigest()
+
+
+def summary_cache_key(category, query, results):
+    return f"{category}:{normalize_query(query)}:{results_fingerprint(results)}"
+
+
+def generate_summary(category, query, results):
+    """Generate natural language response for members/events/offers results"""
+    cache_key = summary_cache_key(category, query, results)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        response = client.chat.completions.create(
+        response = openai_client().chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant. Given a user query and event results, provide a natural, friendly response summarizing the events. Be concise but informative. Use PLAIN TEXT ONLY - no markdown, no asterisks, no special formatting. Just simple conversational text."
-                },
-                {
-                    "role": "user",
-                    "content": f"Query: {query}\n\nResults: {json.dumps(results[:5])}\n\nProvide a friendly summary of these events using plain text only (no markdown formatting)."
-                }
-            ],
+            messages=summary_messages(category, query, results),
             temperature=0.7
         )
-        return response.choices[0].message.content
-    except:
-        return f"Found {len(results)} events matching your criteria."
+    except Exception:
+        return f"Found {len(results)} {category} matching your criteria."
+    record_usage("summary", response)
+    
+    summary = response.choices[0].message.content
+    summary_cache.set(cache_key, summary)
+    return summary
 
 
-def generate_offers_response(query, results):
-    """Generate natural language response for offer queries"""
+def use_template_summary(mode, results, started_at):
+    """Whether to answer with the local template summary instead of a second LLM call"""
+    if mode == "template":
+        return True
+    if mode == "llm":
+        return False
+    
+    # auto: nothing worth phrasing, or the request has already used up its latency budget
+    if len(results) <= 1:
+        return True
+    if SUMMARY_LATENCY_BUDGET_MS and (time.monotonic() - started_at) * 1000 > SUMMARY_LATENCY_BUDGET_MS:
+        return True
+    return False
+
+
+@timed_stage("summarize")
+def summarize_results(category, query, results, mode="auto", started_at=None):
+    """Natural language answer for members/events/offers results, from a template or gpt-4o-mini"""
+    if started_at is None:
+        started_at = time.monotonic()
+    if use_template_summary(mode, results, started_at):
+        return template_summary(category, results)
+    return generate_summary(category, query, results)
+
+
+def stream_summary(category, query, results):
+    """Like generate_summary, but yields the answer in pieces as OpenAI produces them"""
+    cache_key = summary_cache_key(category, query, results)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    pieces = []
     try:
-        response = client.chat.completions.create(
+        stream = openai_client().chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant. Given a user query and offer results, provide a natural, friendly response summarizing the offers. Be concise but informative. Use PLAIN TEXT ONLY - no markdown, no asterisks, no special formatting. Just simple conversational text."
-                },
-                {
-                    "role": "user",
-                    "content": f"Query: {query}\n\nResults: {json.dumps(results[:5])}\n\nProvide a friendly summary of these offers using plain text only (no markdown formatting)."
-                }
-            ],
-            temperature=0.7
+            messages=summary_messages(category, query, results),
+            temperature=0.7,
+            stream=True,
+            # The last chunk then carries the token usage
+            stream_options={"include_usage": True}
         )
-        return response.choices[0].message.content
-    except:
-        return f"Found {len(results)} offers matching your criteria."
+        openai_calls.inc(call="summary")
+        for chunk in stream:
+            count_tokens("summary", chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        logger.warning("Error streaming %s summary: %s", category, e)
+        if not pieces:
+            yield f"Found {len(results)} {category} matching your criteria."
+        return
+    
+    summary_cache.set(cache_key, "".join(pieces))
+
+
+def stream_general(query):
+    """Yield the answer to a general question in pieces as OpenAI produces it"""
+    stream = openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=general_messages(query),
+        temperature=0.7,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    openai_calls.inc(call="general")
+    for chunk in stream:
+        count_tokens("general", chunk)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+
+def create_app():
+    """Flask app serving the API.
+    
+    Creates no clients and opens no connections: those wait for the first
+    request or the warm-up (start_warm_up) that needs them.
+    """
+    app = Flask(__name__)
+    
+    # CORS configuration for web - allow your frontend domains
+    # For development, allow all localhost/127.0.0.1 variants on any port
+    CORS(app, resources={
+        r"/*": {
+            "origins": "*",  # Allow all origins in development
+            "methods": ["GET", "POST", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization"],
+            "supports_credentials": False  # Must be False when origins is *
+        }
+    })
+    
+    app.register_blueprint(api)
+    return app
+
+
+# The app gunicorn serves (gunicorn server:app)
+app = create_app()
 
 
 if __name__ == "__main__":
     # For production, use a production WSGI server like gunicorn
     # gunicorn -w 4 -b 0.0.0.0:5000 app:app
     port = int(os.environ.get("PORT", 5000))
+    start_warm_up()
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
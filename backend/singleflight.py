@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running join it, wait, and get the same result
+    (or exception). Nothing is cached: once the call finishes, the next
+    caller starts a fresh one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.joins = 0
+        self.max_waiters = 0
+
+    def do(self, key, fn):
+        """Return (result, shared) where shared is True if another caller's run was joined"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.joins += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+            waiting = sum(call.waiters for call in self._calls.values())
+        total = self.leaders + self.joins
+        return {
+            "leaders": self.leaders,
+            "joins": self.joins,
+            "in_flight": in_flight,
+            "waiting": waiting,
+            "max_waiters": self.max_waiters,
+            "join_ratio": round(self.joins / total, 4) if total else 0.0,
+        }
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.joins = 0
+        self.max_waiters = 0
+        self._waiters = {}
+
+    async def do(self, key, fn):
+        """Await fn() once per key at a time; returns (result, shared)"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.joins += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+            # shield: a cancelled waiter must not cancel the leader's run
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._waiters[key] = 0
+        self.leaders += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody joined
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+            del self._waiters[key]
+
+    def stats(self):
+        total = self.leaders + self.joins
+        return {
+            "leaders": self.leaders,
+            "joins": self.joins,
+            "in_flight": len(self._calls),
+            "waiting": sum(self._waiters.values()),
+            "max_waiters": self.max_waiters,
+            "join_ratio": round(self.joins / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Speculation:
+    """A guess and the future running the speculative work for it"""
+
+    def __init__(self, guess, future):
+        self.guess = guess
+        self.future = future
+
+
+class Speculator:
+    """Runs speculative work in the background while the real classification is pending.
+
+    Once the classification is known, `resolve()` hands the (possibly already
+    finished) result to a `use` function that turns it into the request's
+    results, or discards it when the request can't use it. Hits and wasted
+    runs are counted so the feature can be judged on real traffic. When every
+    worker is busy, new speculations are skipped rather than queued, so
+    speculation never delays real work.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+        self._running = 0
+        self.started = 0
+        self.skipped = 0
+        self.hits = 0
+        self.wasted = 0
+        self.wasted_ms = 0.0
+
+    def start(self, guess, fn):
+        """Run fn() for `guess` in the background; None if all workers are busy"""
+        with self._lock:
+            if self._running >= self.max_workers:
+                self.skipped += 1
+                return None
+            self._running += 1
+            self.started += 1
+        return Speculation(guess, self.pool.submit(self._run, fn))
+
+    def resolve(self, speculation, use=None):
+        """(True, results) when use(result) answers the request, otherwise (False, None).
+
+        `use` returns None when the result can't answer the request; pass no
+        `use` when the classification already rules the speculation out.
+        """
+        if use is None:
+            # Not needed: drop it if it hasn't started, otherwise count its time once it finishes
+            if speculation.future.cancel():
+                with self._lock:
+                    # _run never started, so release its slot here
+                    self._running -= 1
+                self.record_waste(0.0)
+            else:
+                speculation.future.add_done_callback(self._discard)
+            return False, None
+
+        try:
+            result, elapsed_ms = speculation.future.result()
+            results = use(result)
+        except Exception as e:
+            logger.warning("Error in speculative query: %s", e)
+            self.record_waste(0.0)
+            return False, None
+        if results is None:
+            self.record_waste(elapsed_ms)
+            return False, None
+        self.record_hit()
+        return True, results
+
+    def record_start(self):
+        """Count a speculation run elsewhere (e.g. as an asyncio task)"""
+        with self._lock:
+            self.started += 1
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_waste(self, elapsed_ms):
+        with self._lock:
+            self.wasted += 1
+            self.wasted_ms += elapsed_ms
+
+    def stats(self):
+        with self._lock:
+            resolved = self.hits + self.wasted
+            return {
+                "started": self.started,
+                "skipped": self.skipped,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "wasted_ms": round(self.wasted_ms, 1),
+                "hit_ratio": round(self.hits / resolved, 4) if resolved else 0.0,
+            }
+
+    def _run(self, fn):
+        started_at = time.monotonic()
+        try:
+            return fn(), (time.monotonic() - started_at) * 1000
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _discard(self, future):
+        try:
+            result, elapsed_ms = future.result()
+        except Exception:
+            elapsed_ms = 0.0
+        self.record_waste(elapsed_ms)
@@ -0,0 +1,362 @@
+"""Local stand-ins for the OpenAI and Supabase HTTP APIs, for offline benchmarks.
+
+StandInOpenAI answers chat completions (plain and streamed), model listing
+and embeddings with canned, deterministic content. StandInSupabase serves
+synthetic profiles, events and benefits tables through the subset of the
+PostgREST API the backend uses (select, filters, or=, order, offset/limit).
+Both add configurable latency, jitter and a failure rate to every request.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ishaan", "Diya", "Ananya", "Saanvi", "Meera", "Kabir", "Riya", "Arjun", "Neha", "Rohan", "Priya", "Karan", "Tara"]
+LAST_NAMES = ["Sharma", "Patel", "Mehta", "Iyer", "Reddy", "Gupta", "Nair", "Shah", "Kapoor", "Rao", "Joshi", "Bose"]
+COMPANIES = ["Acme Labs", "Infosys", "Zomato", "Razorpay", "Tata Steel", "Freshworks", "Nykaa", "Byju's", "Ola", "Swiggy", "Mahindra", "Cred"]
+INDUSTRIES = ["Technology", "Fintech", "Healthcare", "Manufacturing", "Retail", "Education", "Media", "Real Estate", "Hospitality", "Logistics"]
+JOB_TITLES = ["Data Scientist", "Software Engineer", "Product Manager", "Founder", "Marketing Head", "CFO", "ML Engineer", "Designer", "Consultant", "Sales Director"]
+LOCATIONS = ["Mumbai", "Delhi", "Bengaluru", "Pune", "Chennai", "Hyderabad", "Kolkata", "Ahmedabad"]
+EVENT_CATEGORIES = ["Networking", "Workshop", "Conference", "Masterclass", "Social", "Sports"]
+EVENT_TOPICS = ["product management", "cyber security", "startup funding", "leadership", "climate", "marketing", "AI", "design thinking"]
+HOSTS = ["tech", "marketing", "finance", "health", "learning", "entrepreneurship"]
+OFFER_TOPICS = ["gym", "travel", "dining", "coworking", "software", "wellness", "books", "car rental"]
+
+# Words dropped when the stand-in classifier turns a query into a keyword
+STOP_WORDS = {
+    "a", "about", "all", "an", "any", "are", "by", "deal", "deals", "discount", "discounts", "event", "events", "find",
+    "for", "from", "in", "is", "list", "me", "member", "members", "of", "offer", "offers", "on", "people", "related",
+    "show", "the", "to", "upcoming", "what", "who", "with", "work", "working", "works",
+}
+
+
+def synthetic_tables(rows=1000, seed=7):
+    """profiles, events and benefits tables with `rows` rows each, sorted by id"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    updated_at = now.isoformat()
+
+    profiles = []
+    for index in range(rows):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        profiles.append({
+            "id": index + 1,
+            "first_name": first,
+            "last_name": last,
+            "full_name": f"{first} {last}",
+            "avatar_url": None,
+            "job_title": rng.choice(JOB_TITLES),
+            "company": rng.choice(COMPANIES),
+            "industry": rng.choice(INDUSTRIES),
+            "location": rng.choice(LOCATIONS),
+            "role": "Member",
+            "updated_at": updated_at,
+        })
+
+    events = []
+    for index in range(rows):
+        topic = rng.choice(EVENT_TOPICS)
+        start = now + timedelta(hours=rng.randint(-24 * 60, 24 * 120))
+        events.append({
+            "id": index + 1,
+            "title": f"{topic.title()} {rng.choice(EVENT_CATEGORIES)} #{index + 1}",
+            "description": f"An evening on {topic} with Yi members.",
+            "category": rng.choice(EVENT_CATEGORIES),
+            "location_name": rng.choice(LOCATIONS),
+            "host_name": rng.choice(HOSTS),
+            "image_url": None,
+            "is_featured": rng.random() < 0.05,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=3)).isoformat(),
+            "updated_at": updated_at,
+        })
+
+    benefits = []
+    for index in range(rows):
+        topic = rng.choice(OFFER_TOPICS)
+        expires = now + timedelta(days=rng.randint(-30, 365))
+        benefits.append({
+            "id": index + 1,
+            "type": "offer" if rng.random() < 0.8 else "benefit",
+            "title": f"{rng.randint(5, 50)}% off {topic}",
+            "description": f"Members save on {topic} with partner #{index + 1}.",
+            "code": None,
+            "promo_code": f"YI{index + 1:05d}",
+            "link": None,
+            "expiration_date": expires.date().isoformat() if rng.random() < 0.9 else None,
+            "updated_at": updated_at,
+        })
+
+    return {"profiles": profiles, "events": events, "benefits": benefits}
+
+
+def classify(query):
+    """Deterministic stand-in for the LLM classifier: (category, filters)"""
+    words = re.findall(r"[a-z0-9']+", query.lower())
+    keyword = " ".join(word for word in words if word not in STOP_WORDS)
+
+    if {"event", "events"} & set(words):
+        filters = {"timeframe": "upcoming"} if "upcoming" in words else {}
+        if keyword:
+            filters["keyword"] = keyword
+        return "events", filters
+    if {"offer", "offers", "deal", "deals", "discount", "discounts"} & set(words):
+        return "offers", {"keyword": keyword} if keyword else {}
+    if {"who", "member", "members", "people", "works", "work", "working"} & set(words):
+        # Like the real classifier, split known companies and cities into column filters
+        columns = {column: value for column, values in (("company", COMPANIES), ("location", LOCATIONS))
+                   for value in values if value.lower() in query.lower()}
+        if columns:
+            return "members", columns
+    if {"works", "work", "working"} & set(words) and keyword:
+        return "members", {"field": keyword}
+    if {"who", "member", "members", "people"} & set(words) and keyword:
+        return "members", {"keyword": keyword}
+    return "general", {}
+
+
+def count_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class StandInServer:
+    """Threaded HTTP server on 127.0.0.1 with latency, jitter and failure injection"""
+
+    handler = None
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, port=0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stand_in = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def delay(self):
+        """Sleep for one request's latency; True if this request should fail"""
+        with self._lock:
+            self.requests += 1
+            pause = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms))
+            fail = self.random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        time.sleep(pause / 1000)
+        return fail
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real APIs, so the backend's connection pools are exercised
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stand_in(self):
+        return self.server.stand_in
+
+    def read_json(self):
+        return json.loads(self.body or b"{}")
+
+    def send_body(self, status, body, content_type="application/json", headers=None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self, method):
+        # Read the body even for injected failures, so the kept-alive connection stays in sync
+        self.body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.stand_in.delay():
+            self.send_body(503, {"error": {"message": "stand-in failure", "type": "server_error"}})
+            return
+        try:
+            self.route(method, urlsplit(self.path))
+        except Exception as e:
+            self.send_body(500, {"error": {"message": str(e), "type": "server_error"}})
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def route(self, method, url):
+        raise NotImplementedError
+
+
+class OpenAIHandler(StandInHandler):
+    def route(self, method, url):
+        if method == "GET" and url.path.endswith("/models"):
+            self.send_body(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "stand-in"}]})
+        elif method == "POST" and url.path.endswith("/chat/completions"):
+            self.chat_completion(self.read_json())
+        elif method == "POST" and url.path.endswith("/embeddings"):
+            self.embeddings(self.read_json())
+        else:
+            self.send_body(404, {"error": {"message": f"No stand-in for {method} {url.path}", "type": "invalid_request_error"}})
+
+    def chat_completion(self, body):
+        messages = body.get("messages", [])
+        system = messages[0]["content"] if messages else ""
+        query = messages[-1]["content"] if messages else ""
+        if "query classifier" in system:
+            category, filters = classify(query)
+            content = json.dumps({"category": category, "filters": filters})
+        elif "Results:" in query:
+            content = "Here is what I found in the community for your query. These look like good matches; reach out through the app to connect."
+        else:
+            content = "Happy to help! This is a canned answer from the local OpenAI stand-in."
+
+        usage = {
+            "prompt_tokens": sum(count_tokens(message["content"]) for message in messages),
+            "completion_tokens": count_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": body.get("model", "gpt-4o-mini")}
+
+        if not body.get("stream"):
+            self.send_body(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        events = []
+        for piece in re.findall(r"\S+\s*", content):
+            events.append({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+        events.append({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        stream = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        self.send_body(200, stream.encode(), content_type="text/event-stream")
+
+    def embeddings(self, body):
+        texts = body.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        dimensions = body.get("dimensions") or 256
+        data = []
+        for index, text in enumerate(texts):
+            rng = random.Random(text)
+            data.append({"object": "embedding", "index": index, "embedding": [rng.uniform(-1, 1) for _ in range(dimensions)]})
+        tokens = sum(count_tokens(text) for text in texts)
+        self.send_body(200, {"object": "list", "data": data, "model": body.get("model"), "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+
+def postgrest_error(code, message):
+    """Error body in PostgREST's shape; the client only parses it with all four keys"""
+    return {"code": code, "message": message, "details": None, "hint": None}
+
+
+class SupabaseHandler(StandInHandler):
+    def route(self, method, url):
+        table = url.path[len("/rest/v1/"):] if url.path.startswith("/rest/v1/") else None
+        if method != "GET" or table not in self.stand_in.tables:
+            self.send_body(404, postgrest_error("42P01", f"relation \"public.{table}\" does not exist"))
+            return
+
+        rows = self.stand_in.select(table, parse_qsl(url.query, keep_blank_values=True))
+        self.send_body(200, rows, headers={"Content-Range": f"0-{max(len(rows) - 1, 0)}/*"})
+
+
+class StandInOpenAI(StandInServer):
+    """OpenAI API stand-in; point the SDK at `url + "/v1"` (OPENAI_BASE_URL)"""
+
+    handler = OpenAIHandler
+
+
+class StandInSupabase(StandInServer):
+    """Supabase REST stand-in serving synthetic tables; use `url` as SUPABASE_URL"""
+
+    handler = SupabaseHandler
+
+    def __init__(self, tables, **kwargs):
+        super().__init__(**kwargs)
+        self.tables = tables
+
+    def select(self, table, params):
+        """Rows of `table` for PostgREST query parameters"""
+        rows = self.tables[table]
+        columns = None
+        order = None
+        offset = 0
+        limit = None
+        for name, value in params:
+            if name == "select":
+                columns = None if value == "*" else value.split(",")
+            elif name == "order":
+                order = value
+            elif name == "offset":
+                offset = int(value)
+            elif name == "limit":
+                limit = int(value)
+            elif name == "or":
+                conditions = [_parse_condition(part) for part in value.strip("()").split(",")]
+                rows = [row for row in rows if any(_matches(row, *condition) for condition in conditions)]
+            else:
+                operator, _, operand = value.partition(".")
+                rows = [row for row in rows if _matches(row, name, operator, operand)]
+
+        # Tables are stored sorted by id, so only other orders need sorting
+        if order and order.split(".")[0] != "id":
+            column, _, direction = order.partition(".")
+            rows = sorted(rows, key=lambda row: str(row.get(column) or ""), reverse=direction.startswith("desc"))
+        rows = rows[offset:offset + limit if limit is not None else None]
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+
+def _parse_condition(text):
+    column, operator, operand = text.split(".", 2)
+    return column, operator, operand
+
+
+def _matches(row, column, operator, operand):
+    value = row.get(column)
+    if operator == "is":
+        return value is None if operand == "null" else str(value).lower() == operand
+    if value is None:
+        return False
+    if operator in ("ilike", "like"):
+        pattern = "^" + ".*".join(re.escape(part) for part in re.split(r"[%*]", operand)) + "$"
+        return re.match(pattern, str(value), re.IGNORECASE if operator == "ilike" else 0) is not None
+    comparisons = {
+        "eq": lambda a, b: a == b,
+        "neq": lambda a, b: a != b,
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+    }
+    text = str(value).lower() if isinstance(value, bool) else str(value)
+    return comparisons[operator](text, operand)
@@ -0,0 +1,188 @@
+"""Cold-start benchmark: import time and first-request latency of a fresh process.
+
+Starts the local OpenAI/Supabase stand-ins from benchmark.py and then, --runs
+times, a new Python process against them, with nothing cached on disk from
+earlier runs. By default each process imports server.py, sends a first
+/health and two /api/chat requests through the Flask test client and
+reports how long each took:
+
+    python startup_benchmark.py --runs 5
+    python startup_benchmark.py --warm-up        # run server.warm_up() before the first request
+    python startup_benchmark.py --modules 15     # slowest imports (python -X importtime)
+
+With --command the process is a real server instead, started on a free
+port (substituted for {port}); reported are the times from spawning it to
+the first /health answer, the first chat answer and /ready:
+
+    python startup_benchmark.py --command "gunicorn -w 1 -b 127.0.0.1:{port} server:app"
+    python startup_benchmark.py --command "uvicorn async_server:app --port {port}"
+"""
+import argparse
+import json
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Line the child process prints its measurements on, after anything the app logs
+RESULT_MARKER = "startup-benchmark:"
+
+
+def child(queries, warm_up):
+    """Runs in the fresh process: import the app, then time the first requests"""
+    started_at = time.monotonic()
+    import server
+    result = {"import_ms": (time.monotonic() - started_at) * 1000}
+
+    if warm_up:
+        started_at = time.monotonic()
+        server.warm_up()
+        result["warm_up_ms"] = (time.monotonic() - started_at) * 1000
+
+    client = server.app.test_client()
+    started_at = time.monotonic()
+    client.get("/health")
+    result["first_health_ms"] = (time.monotonic() - started_at) * 1000
+    for name, query in zip(("first_chat_ms", "second_chat_ms"), queries):
+        started_at = time.monotonic()
+        response = client.post("/api/chat", json={"query": query})
+        result[name] = (time.monotonic() - started_at) * 1000
+        if response.status_code != 200:
+            result["errors"] = result.get("errors", 0) + 1
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def run_in_process(env, args):
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--query", args.query, "--second-query", args.second_query]
+    if args.warm_up:
+        command.append("--warm-up")
+    completed = subprocess.run(command, env=env, cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"No result from the child process:\n{completed.stderr[-2000:]}")
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def run_server(env, args):
+    """Spawn --command and time its first answers, all measured from the spawn"""
+    import httpx
+
+    port = free_port()
+    env = dict(env, PORT=str(port))
+    started_at = time.monotonic()
+    process = subprocess.Popen(
+        shlex.split(args.command.format(port=port)), env=env, cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as http:
+            deadline = started_at + args.timeout
+            while "first_health_ms" not in result:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"{args.command!r} did not answer /health")
+                try:
+                    if http.get("/health").status_code == 200:
+                        result["first_health_ms"] = (time.monotonic() - started_at) * 1000
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            for name, query in zip(("first_chat_ms", "second_chat_ms"), (args.query, args.second_query)):
+                response = http.post("/api/chat", json={"query": query})
+                result[name] = (time.monotonic() - started_at) * 1000
+                if response.status_code != 200:
+                    result["errors"] = result.get("errors", 0) + 1
+            while http.get("/ready").status_code != 200:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{args.command!r} did not get ready")
+                time.sleep(0.01)
+            result["ready_ms"] = (time.monotonic() - started_at) * 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return result
+
+
+def slowest_imports(env, count):
+    """(cumulative ms, module) of the slowest imports of server.py, from python -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        env=env, cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes to start")
+    parser.add_argument("--command", help="server command line to start instead, with {port} for its port")
+    parser.add_argument("--warm-up", action="store_true", help="in-process: run warm_up() before the first request")
+    parser.add_argument("--query", default="upcoming events", help="first chat query")
+    parser.add_argument("--second-query", default="events about product management")
+    parser.add_argument("--modules", type=int, default=0, help="also list this many of the slowest imports")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds --command may take to answer")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    # Stand-in options, as in benchmark.py
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--openai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    args.jitter_ms = args.openai_failure_rate = args.supabase_failure_rate = 0.0
+    args.openai_port = args.supabase_port = 0
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        child((args.query, args.second_query), args.warm_up)
+        return
+
+    openai, supabase = benchmark.start_stand_ins(args)
+    results = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as state_dir:
+            env = dict(os.environ, **benchmark.stand_in_env(openai, supabase), LOG_LEVEL="WARNING")
+            env["SEMANTIC_INDEX_PATH"] = os.path.join(state_dir, "vectors.npz")
+            results.append(run_server(env, args) if args.command else run_in_process(env, args))
+
+    columns = [column for column in results[0] if column != "errors"]
+    summary = {column: round(statistics.median(result[column] for result in results), 1) for column in columns}
+    summary["errors"] = sum(result.get("errors", 0) for result in results)
+    imports = slowest_imports(env, args.modules) if args.modules and not args.command else []
+
+    if args.json:
+        print(json.dumps({"median": summary, "runs": results, "slowest_imports": imports}, indent=2))
+        return
+    print(f"median of {args.runs} runs ({args.command or 'in-process'}):")
+    for column, value in summary.items():
+        print(f"  {column:>16}  {value}")
+    if imports:
+        print("slowest imports (cumulative ms):")
+        for cumulative_ms, name in imports:
+            print(f"  {cumulative_ms:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Minimum level written: DEBUG, INFO, WARNING or ERROR
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (one object per line) or "text" for reading logs in a terminal
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of DEBUG records kept; per-request detail is logged at DEBUG and adds up quickly
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+# Records waiting for the writer thread; when the sink falls this far behind, new records are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Id of the request being handled, attached to every record logged while handling it
+request_id = contextvars.ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed with extra= and is written as a field
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "pid": record.process,
+        }
+        for name, value in vars(record).items():
+            if name not in STANDARD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def formatMessage(self, record):
+        fields = {name: value for name, value in vars(record).items() if name not in STANDARD_ATTRIBUTES}
+        line = super().formatMessage(record)
+        return f"{line} {json.dumps(fields, default=str)}" if fields else line
+
+
+class ContextFilter(logging.Filter):
+    """Tags records with the current request id and samples DEBUG records"""
+
+    def __init__(self, debug_sample_rate=1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    Runs in the logging thread: the record is only tagged and made picklable
+    here, formatting and writing happen on the listener thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback now; args and exc_info may not survive the hand-off
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+_pid = None
+_lock = threading.Lock()
+
+
+def configure_logging():
+    """Route all logging through a queue to a background writer on stdout (once per process).
+
+    Called again in each gunicorn worker after the fork: the writer thread
+    of the parent does not exist in the child.
+    """
+    global _listener, _handler, _pid
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _pid = os.getpid()
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+        root = logging.getLogger()
+        if _handler is not None:
+            root.removeHandler(_handler)
+        _handler = NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(ContextFilter(LOG_DEBUG_SAMPLE_RATE))
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+        # Per-request HTTP client logs would double the volume
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def dropped_records():
+    """Records dropped in this process because the writer fell behind"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def bind_request_id(fn):
+    """Wrap fn so it logs with the current request id when run on another thread"""
+    current = request_id.get()
+
+    def run(*args, **kwargs):
+        request_id.set(current)
+        return fn(*args, **kwargs)
+    return run
@@ -0,0 +1,86 @@
+from event_store import parse_timestamp
+
+# How many results a template summary names before saying "and N more"
+MAX_LISTED = 5
+
+NO_RESULTS = {
+    "members": "I couldn't find any members matching your search. Try a broader term, like an industry, company or job title.",
+    "events": "I couldn't find any events matching your search. Try a different topic or timeframe, or ask about upcoming events.",
+    "offers": "I couldn't find any current offers matching your search. Try a different keyword, or ask to see all offers.",
+}
+
+NOUNS = {
+    "members": ("member", "members"),
+    "events": ("event", "events"),
+    "offers": ("offer", "offers"),
+}
+
+
+def _text(value):
+    return str(value).strip() if value else ""
+
+
+def describe_member(member):
+    name = _text(member.get("full_name")) or " ".join(
+        part for part in (_text(member.get("first_name")), _text(member.get("last_name"))) if part
+    ) or "A member"
+    job_title = _text(member.get("job_title"))
+    company = _text(member.get("company"))
+    location = _text(member.get("location"))
+
+    role = f"{job_title} at {company}" if job_title and company else job_title or company
+    details = ", ".join(part for part in (role, location) if part)
+    return f"{name} ({details})" if details else name
+
+
+def describe_event(event):
+    description = _text(event.get("title")) or "Untitled event"
+    start = parse_timestamp(event.get("start_time"))
+    if start:
+        description += f" on {start.strftime('%b %d, %Y')}"
+    location = _text(event.get("location_name"))
+    if location:
+        description += f" at {location}"
+    return description
+
+
+def describe_offer(offer):
+    description = _text(offer.get("title")) or "An offer"
+    details = _text(offer.get("description"))
+    if details:
+        # Keep the summary short: first sentence, capped at 100 characters
+        first_sentence = details.split(". ")[0].rstrip(".")
+        if len(first_sentence) > 100:
+            first_sentence = first_sentence[:97].rstrip() + "..."
+        description += f" - {first_sentence}"
+    return description
+
+
+DESCRIBERS = {
+    "members": describe_member,
+    "events": describe_event,
+    "offers": describe_offer,
+}
+
+
+def _join(items):
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + f" and {items[-1]}"
+
+
+def summarize(category, results):
+    """Plain-text summary of members/events/offers results built without an LLM call"""
+    if not results:
+        return NO_RESULTS[category]
+
+    singular, plural = NOUNS[category]
+    descriptions = [DESCRIBERS[category](row) for row in results[:MAX_LISTED]]
+
+    if len(results) == 1:
+        return f"I found one {singular} for you: {descriptions[0]}."
+
+    summary = f"I found {len(results)} {plural} for you. Top matches: {_join(descriptions)}."
+    if len(results) > MAX_LISTED:
+        summary += f" There are {len(results) - MAX_LISTED} more in the results below."
+    return summary
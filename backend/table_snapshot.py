@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Supabase caps a single select at 1000 rows, so full-table loads are paged
+PAGE_SIZE = 1000
+
+
+def fetch_all_rows(supabase, table, columns="*", order_by="id"):
+    """Download every row of a table, one page at a time"""
+    rows = []
+    start = 0
+    while True:
+        page = (
+            supabase.table(table)
+            .select(columns)
+            .order(order_by)
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+            .data
+        )
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+class TableSnapshot:
+    """In-memory copy of a table that each worker keeps and refreshes.
+
+    The first access loads synchronously. After `ttl` seconds the snapshot
+    is considered stale: readers keep getting the old state while a single
+    background thread rebuilds it, so no request ever waits on a refresh.
+    Subclasses turn the raw rows into whatever lookup structure they need
+    by implementing `build(rows)`.
+    """
+
+    def __init__(self, loader, ttl=300):
+        self.loader = loader
+        self.ttl = ttl
+        self._state = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_flag_lock = threading.Lock()
+        self._refreshing = False
+
+    def build(self, rows):
+        raise NotImplementedError
+
+    def state(self):
+        """Return the current state, loading or scheduling a refresh if needed"""
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    self._load()
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            self._refresh_in_background()
+        return self._state
+
+    def invalidate(self):
+        """Force the next access to trigger a refresh"""
+        self._loaded_at = 0.0
+
+    def refresh(self):
+        """Rebuild the snapshot now"""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        rows = self.loader()
+        self._state = self.build(rows)
+        self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self):
+        with self._refresh_flag_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            # Keep serving the previous snapshot; retry after another ttl
+            logger.warning("Error refreshing %s: %s", type(self).__name__, e)
+            self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing = False
@@ -0,0 +1,80 @@
+import pytest
+
+import cache
+from cache import MemoryBackend, SQLiteBackend, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=2)
+    return SQLiteBackend(str(tmp_path / "cache.sqlite3"), table="test_cache", max_entries=2)
+
+
+def test_entries_expire_after_ttl(backend, clock):
+    entries = TTLCache(backend, "test", ttl=60)
+    entries.set("events today", {"category": "events"})
+    clock.now += 59
+    assert entries.get("events today") == {"category": "events"}
+    clock.now += 2
+    assert entries.get("events today") is None
+    assert entries.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted(backend, clock):
+    entries = TTLCache(backend, "test", ttl=60)
+    entries.set("a", 1)
+    clock.now += 1
+    entries.set("b", 2)
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used
+    assert entries.get("a") == 1
+    clock.now += 1
+    entries.set("c", 3)
+    assert (entries.get("a"), entries.get("b"), entries.get("c")) == (1, None, 3)
+
+
+def test_overwrite_renews_expiry(backend, clock):
+    entries = TTLCache(backend, "test", ttl=60)
+    entries.set("a", 1)
+    clock.now += 50
+    entries.set("a", 2)
+    clock.now += 50
+    assert entries.get("a") == 2
+
+
+def test_sqlite_entries_are_shared_across_instances(tmp_path, clock):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = TTLCache(SQLiteBackend(path, table="shared_cache"), "shared", ttl=60)
+    reader = TTLCache(SQLiteBackend(path, table="shared_cache"), "shared", ttl=60)
+    writer.set("upcoming events", {"category": "events", "filters": {"timeframe": "upcoming"}})
+    assert reader.get("upcoming events") == {"category": "events", "filters": {"timeframe": "upcoming"}}
+
+
+def test_backend_errors_count_as_misses(clock):
+    class Broken:
+        def get(self, key):
+            raise OSError("disk full")
+
+        def set(self, key, value, expires_at):
+            raise OSError("disk full")
+
+    entries = TTLCache(Broken(), "broken", ttl=60)
+    entries.set("a", 1)
+    assert entries.get("a") is None
+    assert entries.stats()["misses"] == 1
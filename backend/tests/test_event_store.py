@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from event_store import EventStore, parse_timestamp
+
+NOON = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+EVENTS = [
+    {"id": 1, "title": "Finished", "start_time": "2026-03-10T08:00:00+00:00", "end_time": "2026-03-10T10:00:00+00:00"},
+    {"id": 2, "title": "Ends at noon", "start_time": "2026-03-10T09:00:00Z", "end_time": "2026-03-10T12:00:00Z"},
+    {"id": 3, "title": "Starts at noon", "start_time": "2026-03-10T12:00:00+00:00", "end_time": "2026-03-10T14:00:00+00:00"},
+    {"id": 4, "title": "Running, other zone", "start_time": "2026-03-10T15:30:00+05:30", "end_time": "2026-03-10T18:30:00+05:30"},
+    {"id": 5, "title": "No end", "start_time": "2026-03-10T11:00:00"},
+    {"id": 6, "title": "Tomorrow", "start_time": "2026-03-11T09:00:00+00:00", "end_time": "2026-03-11T10:00:00+00:00"},
+    {"id": 7, "title": "Unscheduled", "start_time": None},
+    {"id": 8, "title": "Bad timestamp", "start_time": "soon"},
+]
+
+
+@pytest.fixture
+def store():
+    return EventStore(lambda: list(EVENTS))
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_parse_timestamp_normalizes_to_utc():
+    assert parse_timestamp("2026-03-10T09:00:00Z") == datetime(2026, 3, 10, 9, tzinfo=timezone.utc)
+    assert parse_timestamp("2026-03-10T15:30:00+05:30") == datetime(2026, 3, 10, 10, tzinfo=timezone.utc)
+    # Naive timestamps are taken as UTC, like Postgres timestamp columns
+    assert parse_timestamp("2026-03-10T11:00:00") == datetime(2026, 3, 10, 11, tzinfo=timezone.utc)
+    assert parse_timestamp("soon") is None
+    assert parse_timestamp(None) is None
+
+
+def test_all_sorts_by_start_with_unscheduled_last(store):
+    assert ids(store.all()) == [1, 2, 4, 5, 3, 6, 7, 8]
+
+
+def test_starting_between_includes_both_bounds(store):
+    start = datetime(2026, 3, 10, 9, tzinfo=timezone.utc)
+    assert ids(store.starting_between(start, NOON)) == [2, 4, 5, 3]
+    assert ids(store.starting_between(NOON, NOON)) == [3]
+
+
+def test_starting_after_includes_the_moment(store):
+    assert ids(store.starting_after(NOON)) == [3, 6]
+    assert store.starting_after(datetime(2027, 1, 1, tzinfo=timezone.utc)) == []
+
+
+def test_ongoing_at_boundaries(store):
+    # Started at or before noon and ending at or after it; events without an end_time are left out
+    assert ids(store.ongoing(NOON)) == [2, 4, 3]
+
+
+def test_ongoing_before_anything_started(store):
+    assert store.ongoing(datetime(2026, 3, 1, tzinfo=timezone.utc)) == []
+
+
+def test_rank_searches_only_the_given_rows(store):
+    upcoming = store.starting_after(NOON)
+    assert ids(store.rank("tomorrow", upcoming)) == [6]
+    assert store.rank("finished", upcoming) == []
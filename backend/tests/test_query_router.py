@@ -0,0 +1,79 @@
+import pytest
+
+from query_router import QueryRouter, search_terms, time_relative
+
+
+@pytest.fixture
+def router():
+    return QueryRouter()
+
+
+@pytest.mark.parametrize("query, category, filters", [
+    ("upcoming events", "events", {"timeframe": "upcoming"}),
+    ("product management events", "events", {"keyword": "product management"}),
+    ("offers related to gym", "offers", {"keyword": "gym"}),
+    ("members at infosys", "members", {"company": "infosys"}),
+    ("members based in pune", "members", {"location": "pune"}),
+    ("who works in data science", "members", {"field": "data science"}),
+    ("members in the fintech industry", "members", {"industry": "fintech"}),
+])
+def test_routes_single_constraint(router, query, category, filters):
+    result = router.route(query)
+    assert (result.category, result.filters) == (category, filters)
+    assert result.confidence >= 0.85
+
+
+@pytest.mark.parametrize("query", [
+    "members at infosys in pune",
+    "people working at tcs based in mumbai",
+    "who is working in data science at google",
+    "members from the food and beverage industry",
+    "offers related to gym near andheri",
+])
+def test_leaves_joined_constraints_to_the_llm(router, query):
+    # Below the server's 0.8 threshold, so the classifier splits the filters
+    result = router.route(query)
+    assert result.route is None
+    assert result.confidence < 0.8
+
+
+@pytest.mark.parametrize("query, category", [
+    ("yesterday events", "events"),
+    ("december events", "events"),
+    ("2026 events", "events"),
+    ("old events", "events"),
+    ("cancelled events", "events"),
+    ("events about last week", "events"),
+    ("best offers", "offers"),
+    ("top 5 offers", "offers"),
+    ("cheap offers", "offers"),
+    ("expired offers", "offers"),
+])
+def test_leaves_qualified_listings_to_the_llm(router, query, category):
+    # A time, order, price or status word is not a search keyword
+    result = router.route(query)
+    assert (result.category, result.route) == (category, None)
+    assert result.confidence < 0.8
+
+
+def test_low_confidence_guess_keeps_category(router):
+    assert router.route("members at infosys in pune").category == "members"
+
+
+def test_search_terms_keep_only_content_words():
+    assert search_terms("tell me about members at infosys in pune") == ["infosys", "pune"]
+    assert search_terms("who works in data science") == ["data", "science"]
+
+
+@pytest.mark.parametrize("query, relative", [
+    ("events today", True),
+    ("what's on this weekend", True),
+    ("events next month", True),
+    ("meetups on friday", True),
+    ("events in 3 days", True),
+    ("upcoming events", False),
+    ("events on 2026-01-15", False),
+    ("product management events", False),
+])
+def test_time_relative(query, relative):
+    assert time_relative(query) is relative
@@ -0,0 +1,47 @@
+import math
+import random
+
+import pytest
+
+from ranking import BM25Index
+
+pytest.importorskip("numpy")
+
+WORDS = ["data", "database", "science", "scientist", "engineer", "engineering", "product", "manager",
+         "design", "marketing", "sales", "finance", "founder", "ml", "ai", "mumbai", "pune", "delhi"]
+
+
+@pytest.fixture(scope="module")
+def churned_index():
+    rng = random.Random(7)
+    rows = 2000
+    index = BM25Index({"title": 3.0, "industry": 2.0, "bio": 1.0})
+    for key in range(rows):
+        index.add(key, {field: " ".join(rng.choices(WORDS, k=rng.randint(0, 6))) for field in index.fields})
+    # Churn some rows so the incremental statistics are exercised too
+    for key in rng.sample(range(rows), rows // 10):
+        index.remove(key)
+    for key in range(rows, rows + rows // 20):
+        index.add(key, {"title": rng.choice(WORDS), "industry": None, "bio": rng.choice(WORDS)})
+    return index, rng
+
+
+def test_vectorized_scoring_matches_python_scoring(churned_index):
+    index, rng = churned_index
+    mismatches = []
+    for _ in range(300):
+        query = " ".join(rng.choices(WORDS + ["eng", "sci", "zzz"], k=rng.randint(1, 3)))
+        boosts = rng.choice([None, {"title": 1.0, "industry": 0.5}])
+        keys = rng.choice([None, {key: position for position, key in enumerate(rng.sample(list(index.docs), 500))}])
+        limit = rng.choice([1, 5, 20])
+        expected = index.search_python(query, limit, boosts, keys)
+        actual = index.search_vectorized(query, limit, boosts, keys)
+        same_scores = len(expected) == len(actual) and all(
+            math.isclose(a[1], b[1], rel_tol=1e-9) for a, b in zip(expected, actual)
+        )
+        # Rows tied at the cut-off may legitimately differ; everything above it must match
+        cutoff = expected[-1][1] * (1 + 1e-9) if expected else 0.0
+        same_rows = {k for k, score in expected if score > cutoff} == {k for k, score in actual if score > cutoff}
+        if not (same_scores and same_rows):
+            mismatches.append(query)
+    assert mismatches == []
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_with_joiner(flight, fn):
+    """Start a leader running fn, join it from a second thread, then let fn finish; returns both outcomes"""
+    release = threading.Event()
+    outcomes = {}
+
+    def run():
+        release.wait(5)
+        return fn()
+
+    def call(name):
+        try:
+            outcomes[name] = flight.do("key", run)
+        except Exception as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=call, args=("leader",))
+    leader.start()
+    wait_for(lambda: flight.stats()["in_flight"] == 1)
+    joiner = threading.Thread(target=call, args=("joiner",))
+    joiner.start()
+    wait_for(lambda: flight.stats()["waiting"] == 1)
+    release.set()
+    leader.join()
+    joiner.join()
+    return outcomes
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    calls = []
+    outcomes = run_with_joiner(flight, lambda: calls.append(1) or "answer")
+    assert calls == [1]
+    assert outcomes == {"leader": ("answer", False), "joiner": ("answer", True)}
+    assert flight.stats()["leaders"] == 1 and flight.stats()["joins"] == 1
+
+
+def test_leader_error_reaches_every_caller():
+    flight = SingleFlight()
+    error = RuntimeError("classifier down")
+
+    def fail():
+        raise error
+
+    outcomes = run_with_joiner(flight, fail)
+    assert outcomes == {"leader": error, "joiner": error}
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_finished_call_is_not_cached():
+    flight = SingleFlight()
+    calls = []
+    assert flight.do("key", lambda: calls.append(1) or 1) == (1, False)
+    assert flight.do("key", lambda: calls.append(2) or 2) == (2, False)
+    assert calls == [1, 2]
+
+
+def test_async_concurrent_callers_share_one_run():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        joiner = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        release.set()
+        return calls, await leader, await joiner, flight.stats()
+
+    calls, leader, joiner, stats = asyncio.run(scenario())
+    assert calls == [1]
+    assert (leader, joiner) == (("answer", False), ("answer", True))
+    assert (stats["leaders"], stats["joins"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_async_leader_error_reaches_every_caller():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise RuntimeError("classifier down")
+
+        leader = asyncio.create_task(flight.do("key", fail))
+        await asyncio.sleep(0)
+        joiner = asyncio.create_task(flight.do("key", fail))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(leader, joiner, return_exceptions=True)
+
+    leader, joiner = asyncio.run(scenario())
+    assert isinstance(leader, RuntimeError) and joiner is leader
+
+
+def test_async_cancelled_joiner_leaves_the_leader_running():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        joiner = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        joiner.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await joiner
+        return await leader
+
+    assert asyncio.run(scenario()) == ("answer", False)
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Replaced before anything is written: contact details, links and long numbers
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+NUMBER_PATTERN = re.compile(r"\d{5,}")
+
+# Records waiting for the writer thread; beyond this they are dropped, never blocking a request
+QUEUE_SIZE = 10000
+
+
+def scrub(query, names=()):
+    """Query with emails, URLs, phone numbers, long numbers and known member names replaced"""
+    query = EMAIL_PATTERN.sub("<email>", query)
+    query = URL_PATTERN.sub("<url>", query)
+    query = PHONE_PATTERN.sub("<phone>", query)
+    query = NUMBER_PATTERN.sub("<number>", query)
+    if names:
+        query = " ".join("<name>" if word.strip(".,?!'\"").lower() in names else word for word in query.split())
+    return query
+
+
+class TrafficCapture:
+    """Appends scrubbed chat requests to a JSONL file for replay.py.
+
+    Each line has the wall-clock time, the scrubbed normalized query, summary
+    mode, category, status, latency and per-stage timings of one request.
+    Lines are written by a background thread per worker; every worker appends
+    whole lines to the same file. `names` returns the lowercase member names
+    to scrub from queries.
+    """
+
+    def __init__(self, path, sample_rate=1.0, names=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.names = names
+        self.captured = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def record(self, query, summary_mode, category, status, elapsed_ms, stages=None):
+        if random.random() >= self.sample_rate:
+            return
+        self._start()
+        entry = {
+            "ts": round(time.time(), 3),
+            "query": query,
+            "summary_mode": summary_mode,
+            "category": category,
+            "status": status,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "stages": {name: round(ms, 1) for name, ms in stages or []},
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self):
+        return {"path": self.path, "captured": self.captured, "dropped": self.dropped, "pending": self._queue.qsize()}
+
+    def _start(self):
+        # Once per process, so gunicorn workers forked from a preloaded app get their own writer
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._write, daemon=True).start()
+
+    def _write(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                names = self.names() if self.names else ()
+                entry["query"] = scrub(entry["query"], names)
+                # One write per line in append mode keeps lines from different workers whole
+                with open(self.path, "a", encoding="utf-8") as capture_file:
+                    capture_file.write(json.dumps(entry) + "\n")
+                self.captured += 1
+            except Exception as e:
+                logger.warning("Error writing traffic capture: %s", e)
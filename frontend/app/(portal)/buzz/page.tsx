@@ -82,6 +82,11 @@ export default function BuzzPage() {
       const data = await response.json()
       console.log("✅ Response data:", data)
 
+      // Hardcoded answers arrive instantly; the backend asks for a short pause before showing them
+      if (data.delay_ms) {
+        await new Promise((resolve) => setTimeout(resolve, data.delay_ms))
+      }
+
       const assistantMessage: Message = {
         id: (Date.now() + 1).toString(),
         role: "assistant",
@@ -164,6 +169,10 @@ export default function BuzzPage() {
         const data = await response.json()
         console.log("✅ Response data:", data)
 
+        if (data.delay_ms) {
+          await new Promise((resolve) => setTimeout(resolve, data.delay_ms))
+        }
+
         const assistantMessage: Message = {
           id: (Date.now() + 1).toString(),
           role: "assistant",
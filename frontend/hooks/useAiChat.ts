@@ -107,6 +107,11 @@ export function useAiChat() {
             }
 
             response = await res.json()
+
+            // Hardcoded answers arrive instantly; the backend asks for a short pause before showing them
+            if (response.delay_ms) {
+              await new Promise((resolve) => setTimeout(resolve, response.delay_ms))
+            }
           } catch (err) {
             clearTimeout(timeoutId)
             if (err instanceof Error && err.name === 'AbortError') {
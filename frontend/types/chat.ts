@@ -35,4 +35,5 @@ export interface ChatResponse {
   answer: string
   data?: MemberData[] | EventData[] | OfferData[]
   category?: "members" | "events" | "offers" | "general"
+  delay_ms?: number // Pause before showing a hardcoded answer
 }